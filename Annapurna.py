@@ -2,19 +2,18 @@ import sys
 import os
 import json
 from pathlib import Path
-from datetime import datetime
 import uuid
 import hashlib
-from google_auth_oauthlib.flow import Flow
 from dotenv import load_dotenv
 import streamlit as st
-from googleapiclient.discovery import build
 from firebase_config import db
-from chatbot_utils import AnniChatbot
-import google.generativeai as genai
+from chatbot_utils import AnniChatbot, ConversationHistory, create_shared_model, current_model_name
+from utils.llm_backends import use_fake_backend
+from utils.lazy_imports import Flow, build
 
 # Assuming utils/styles.py contains these functions
 from utils.styles import load_css, set_page_config, apply_custom_styles
+from utils.static_assets import static_image
 
 # Add the project root to the Python path
 project_root = str(Path(__file__).parent.absolute())
@@ -30,6 +29,8 @@ set_page_config()
 env_path = Path(__file__).parent / '.env'
 load_dotenv(env_path, override=True)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# LLM_BACKEND=fake runs Anni on the offline stand-in, without an API key
+CHATBOT_ENABLED = bool(GEMINI_API_KEY) or use_fake_backend()
 
 # ----------------------------------------------------------------
 # GOOGLE OAUTH CONFIGURATION
@@ -103,6 +104,38 @@ def check_user_in_firebase(email: str):
     
     return None, None
 
+# --- CHATBOT (LAZY) ---
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_anni_model(api_key: str, model_name: str):
+    """Gemini model shared by every session; built once per process and model."""
+    return create_shared_model(api_key, model_name)
+
+def get_chatbot():
+    """Return this session's chatbot, creating it on first use."""
+    if st.session_state.chatbot is None and CHATBOT_ENABLED:
+        try:
+            st.session_state.chatbot = AnniChatbot(
+                GEMINI_API_KEY,
+                # Keyed on the registry's choice, so a model dropped after a
+                # 404 in one session is not handed to new sessions
+                model=get_anni_model(GEMINI_API_KEY, current_model_name(GEMINI_API_KEY)),
+                history=st.session_state.chat_history,
+            )
+        except Exception as e:
+            print(f"❌ Chatbot init error: {e}")
+    return st.session_state.chatbot
+
+def render_chat_message(role, content):
+    """Render one chat bubble in the message area."""
+    role_class = "user" if role == 'user' else "bot"
+    avatar = "👤" if role == 'user' else "🤖"
+    st.markdown(f'''
+    <div class="message {role_class}">
+        <div class="message-avatar">{avatar}</div>
+        <div class="message-content">{content}</div>
+    </div>
+    ''', unsafe_allow_html=True)
+
 # --- HELPER FUNCTION FOR DIRECT FORM NAVIGATION ---
 def navigate_to_form(role):
     """Navigate directly to the donation/acceptance form based on role"""
@@ -133,14 +166,17 @@ if 'show_welcome_message' not in st.session_state:
 if 'redirect_to_form' not in st.session_state:
     st.session_state.redirect_to_form = False
 
+# Chatbot is created lazily the first time the chat window is opened
 if 'chatbot' not in st.session_state:
-    if GEMINI_API_KEY:
-        st.session_state.chatbot = AnniChatbot(GEMINI_API_KEY)
-    else:
-        st.session_state.chatbot = None
+    st.session_state.chatbot = None
 
+# One transcript shared by the chat window and the chatbot's model context
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = ConversationHistory()
+
+# Message waiting for Anni's streamed reply on the next run
+if 'pending_chat_message' not in st.session_state:
+    st.session_state.pending_chat_message = None
 
 if 'show_chatbot' not in st.session_state:
     st.session_state.show_chatbot = False
@@ -346,7 +382,7 @@ apply_custom_styles()
 
 # --- SIDEBAR ---
 with st.sidebar:
-    st.image("assets/Annapurna logo.png", width=1000)
+    static_image("Annapurna logo.png", 512)
     st.markdown("---")
 
     if st.session_state.logged_in:
@@ -858,15 +894,15 @@ st.markdown('''
 
 col_d1, col_d2 = st.columns(2, gap="medium")
 with col_d1:
-    st.image("assets/donor-1.jpg", use_container_width=True)
+    static_image("donor-1.jpg", 960)
 with col_d2:
-    st.image("assets/donor-2.jpg", use_container_width=True)
+    static_image("donor-2.jpg", 960)
 
 col_d3, col_d4 = st.columns(2, gap="medium")
 with col_d3:
-    st.image("assets/donor-3.jpg", use_container_width=True)
+    static_image("donor-3.jpg", 960)
 with col_d4:
-    st.image("assets/donor-4.jpg", use_container_width=True)
+    static_image("donor-4.jpg", 960)
 
 st.markdown('''
 <div style="display: flex; align-items: center; justify-content: center; gap: 1rem; margin: 2.5rem 0 1.5rem;">
@@ -876,15 +912,15 @@ st.markdown('''
 
 col_n1, col_n2 = st.columns(2, gap="medium")
 with col_n1:
-    st.image("assets/ngo-1.jpg", use_container_width=True)
+    static_image("ngo-1.jpg", 960)
 with col_n2:
-    st.image("assets/ngo-2.jpg", use_container_width=True)
+    static_image("ngo-2.jpg", 960)
 
 col_n3, col_n4 = st.columns(2, gap="medium")
 with col_n3:
-    st.image("assets/ngo-3.jpg", use_container_width=True)
+    static_image("ngo-3.jpg", 960)
 with col_n4:
-    st.image("assets/ngo-4.jpg", use_container_width=True)
+    static_image("ngo-4.jpg", 960)
 
 st.markdown("""
 <div style="text-align: center; margin: 3rem 0 2rem;">
@@ -941,7 +977,7 @@ if not st.session_state.logged_in:
     else:
         st.warning("⚠️ Google OAuth is not configured. Please use the specific Donor/NGO pages for login.")
 # --- CHATBOT UI ---
-if st.session_state.chatbot:
+if CHATBOT_ENABLED:
     # CSS for floating button AND new chat window
     st.markdown('''
     <style>
@@ -1099,6 +1135,8 @@ if st.session_state.chatbot:
 
     # Chat window - Built with native Streamlit containers
     if st.session_state.show_chatbot:
+        with st.spinner("Waking up Anni..."):
+            chatbot = get_chatbot()
         
         # This is the main window container
         with st.container(border=False):
@@ -1124,7 +1162,8 @@ if st.session_state.chatbot:
                 # Marker div for CSS to target message area
                 st.markdown('<div class="chat-messages-marker"></div>', unsafe_allow_html=True)
                 
-                if not st.session_state.chat_history:
+                pending_message = st.session_state.pending_chat_message
+                if not st.session_state.chat_history and not pending_message:
                     st.markdown('''
                     <div class="message bot">
                         <div class="message-avatar">🤖</div>
@@ -1140,14 +1179,25 @@ if st.session_state.chatbot:
                     ''', unsafe_allow_html=True)
                 
                 for msg in st.session_state.chat_history:
-                    role_class = "user" if msg['role'] == 'user' else "bot"
-                    avatar = "👤" if msg['role'] == 'user' else "🤖"
-                    st.markdown(f'''
-                    <div class="message {role_class}">
-                        <div class="message-avatar">{avatar}</div>
-                        <div class="message-content">{msg['content']}</div>
-                    </div>
-                    ''', unsafe_allow_html=True)
+                    render_chat_message(msg['role'], msg['content'])
+
+                # Stream Anni's reply into the message area as it is generated;
+                # the chatbot records the turn in chat_history when it finishes
+                if pending_message:
+                    st.session_state.pending_chat_message = None
+                    render_chat_message('user', pending_message)
+                    if chatbot:
+                        queue_wait = chatbot.estimated_wait()
+                        if queue_wait >= 1:
+                            st.caption(f"⏳ Anni is busy right now; your message is queued (about {queue_wait:.0f}s).")
+                        st.write_stream(chatbot.stream_response(pending_message))
+                    else:
+                        st.session_state.chat_history.add_turn(
+                            pending_message,
+                            "I'm having trouble connecting right now. 😔 Please try again in a moment.",
+                            in_context=False,
+                        )
+                    st.rerun()
             
             # --- Input Area ---
             with st.container(border=False):
@@ -1164,25 +1214,12 @@ if st.session_state.chatbot:
                         clear = st.form_submit_button("Clear", use_container_width=True)
                     
                     if send and user_input:
-                        st.session_state.chat_history.append({
-                            'role': 'user',
-                            'content': user_input,
-                            'timestamp': datetime.now()
-                        })
-                        
-                        with st.spinner("Anni is thinking..."):
-                            response = st.session_state.chatbot.get_response(user_input)
-                        
-                        st.session_state.chat_history.append({
-                            'role': 'bot',
-                            'content': response,
-                            'timestamp': datetime.now()
-                        })
+                        st.session_state.pending_chat_message = user_input
                         st.rerun()
                     
                     if clear:
-                        st.session_state.chat_history = []
-                        st.session_state.chatbot.reset_chat()
+                        st.session_state.chat_history.clear()
+                        st.session_state.pending_chat_message = None
                         st.rerun()
 
 else:
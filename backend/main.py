@@ -1,66 +1,48 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
+import base64
+import json
+import math
 import os
+import sys
 
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import firestore
+from google.api_core.exceptions import ResourceExhausted
 
 # --------------------------------------------------------------------------
 # --- ENV + FIREBASE INITIALIZATION ---
 # --------------------------------------------------------------------------
 
-# Load .env from project root (one level above backend/)
-ENV_PATH = Path(__file__).parent.parent / ".env"
+# Project root (one level above backend/) holds .env and the shared utils package
+PROJECT_ROOT = Path(__file__).parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils import donations as donations_service  # noqa: E402
+from utils.aggregates import create_counted_async  # noqa: E402
+
+ENV_PATH = PROJECT_ROOT / ".env"
 load_dotenv(ENV_PATH, override=True)
-def init_firestore():
-    try:
-        if not firebase_admin._apps:
-            # Try to get credentials from environment variable (JSON string)
-            firebase_creds_json = os.getenv("FIREBASE_CREDENTIALS_JSON")
-            
-            if firebase_creds_json:
-                # Parse JSON string directly (for Render)
-                import json
-                cred_dict = json.loads(firebase_creds_json)
-                cred = credentials.Certificate(cred_dict)
-                print("✅ [backend] Using Firebase credentials from FIREBASE_CREDENTIALS_JSON env var")
-            else:
-                # Fallback to file path (for local development only)
-                possible_paths = [
-                    os.getenv("FIREBASE_CREDENTIALS_JSON_PATH"),
-                    "firebase_credentials.json",
-                    "serviceAccount.json",
-                ]
-                
-                cred_path = None
-                for p in possible_paths:
-                    if p and os.path.exists(p):
-                        cred_path = p
-                        break
-                
-                if not cred_path:
-                    raise RuntimeError("Firebase credentials not found in env or file system")
-                
-                cred = credentials.Certificate(cred_path)
-                print(f"✅ [backend] Using Firebase credentials from file: {cred_path}")
-
-            firebase_admin.initialize_app(cred)
-            print("✅ [backend] Firebase initialized successfully")
-
-        return firestore.client()
 
-    except Exception as e:
-        print(f"❌ [backend] Firebase initialization error: {e}")
-        return None
-        
-db = init_firestore()
+from firebase_config import firebase_state  # noqa: E402
+from chatbot_utils import normalize_prompt, response_cache  # noqa: E402
+from utils.lazy_imports import genai  # noqa: E402
+from utils.llm_backends import LLMBackend, create_backend, use_fake_backend  # noqa: E402
+from utils.rate_limit import CHAT_QUOTA_BACKOFF, AsyncCoalescer, RateLimited, RateLimiter  # noqa: E402
+
+
+# One Firebase app and AsyncClient per process, shared with the Streamlit app's
+# bootstrap (credential discovery, health state)
+db = firebase_state.get_async_client()
 if db is None:
     # We still start the server, but endpoints will raise 500 if DB is not ready
     print("⚠️ Firestore DB is NOT initialized. API calls will fail until fixed.")
@@ -70,14 +52,108 @@ if db is None:
 # --------------------------------------------------------------------------
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
+if use_fake_backend():
+    # LLM_BACKEND=fake: offline stand-in for load tests, no key or network needed
+    print("⚠️ Using the offline fake LLM backend")
+elif not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY environment variable is not set")
+else:
+    try:
+        genai.configure(api_key=GEMINI_API_KEY)
+        print("✅ Gemini API configured successfully")
+    except Exception as e:
+        raise RuntimeError(f"Failed to configure Gemini API: {str(e)}")
+
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-pro-latest")
+# Max concurrent upstream Gemini calls, and how long a request may wait for a slot
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", "30"))
+
 
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print("✅ Gemini API configured successfully")
-except Exception as e:
-    raise RuntimeError(f"Failed to configure Gemini API: {str(e)}")
+def chat_cache_namespace(model_name: str, generation_config: Optional[dict]):
+    """Answers are only reused for the same model and generation overrides."""
+    return ("api", model_name, tuple(sorted((generation_config or {}).items())))
+
+
+class ModelPool:
+    """
+    Model backends (Gemini, or the offline fake) built once at startup and
+    shared by all requests.
+    Upstream calls go through a global token bucket (requests per minute)
+    and a semaphore (concurrent calls), so bursts queue here instead of
+    exceeding the Gemini quota. Identical prompts in flight at the same
+    time share one call through `coalescer`.
+    """
+
+    def __init__(self, default_model: str, max_concurrency: int, queue_timeout: float,
+                 limiter: Optional[RateLimiter] = None):
+        self.default_model = default_model
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.limiter = limiter or RateLimiter()
+        self.coalescer = AsyncCoalescer()
+        self._models = {}
+        self.get_model(default_model)
+
+    def get_model(self, model_name: Optional[str] = None) -> LLMBackend:
+        model_name = model_name or self.default_model
+        if model_name not in self._models:
+            self._models[model_name] = create_backend(model_name)
+        return self._models[model_name]
+
+    async def acquire(self):
+        # RateLimited if the global queue is longer than CHAT_MAX_QUEUE_WAIT
+        await self.limiter.acquire_async()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI assistant is busy. Please try again in a moment.",
+            )
+
+    async def generate(self, prompt: str, generation_config: Optional[dict] = None) -> str:
+        await self.acquire()
+        try:
+            return await self.get_model().generate_async(prompt, generation_config)
+        finally:
+            self.semaphore.release()
+
+    async def stream(self, prompt: str, generation_config: Optional[dict] = None):
+        """
+        Start a streaming generation and return an async iterator of text
+        chunks. Errors before the first chunk (busy, bad model) raise here;
+        the slot is held until the iterator finishes.
+        """
+        await self.acquire()
+        response = self.get_model().stream_async(prompt, generation_config)
+        try:
+            # The request is only sent once iteration starts
+            first = await response.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+        async def chunks():
+            try:
+                if first is not None:
+                    yield first
+                    async for text in response:
+                        yield text
+            finally:
+                await response.aclose()
+                self.semaphore.release()
+
+        return chunks()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.model_pool = ModelPool(GEMINI_MODEL_NAME, GEMINI_MAX_CONCURRENCY, GEMINI_QUEUE_TIMEOUT)
+    print(f"✅ Gemini model pool ready: {GEMINI_MODEL_NAME} (max {GEMINI_MAX_CONCURRENCY} concurrent)")
+    yield
 
 # --------------------------------------------------------------------------
 # --- FASTAPI APP + CORS ---
@@ -87,6 +163,7 @@ app = FastAPI(
     title="Annapurna FoodBridge API",
     description="Backend services for handling donations and AI chat for the NGO portal.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # TODO: Replace "*" with your exact Streamlit Cloud URL for better security
@@ -101,14 +178,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Page-Token", "X-Queue-Wait", "Retry-After"],
 )
 
 # --------------------------------------------------------------------------
 # --- Pydantic Data Models ---
 # --------------------------------------------------------------------------
 
+class GenerationOverrides(BaseModel):
+    """Optional per-request Gemini generation config overrides."""
+    temperature: Optional[float] = Field(None, ge=0.0, le=2.0)
+    top_p: Optional[float] = Field(None, ge=0.0, le=1.0)
+    top_k: Optional[int] = Field(None, ge=1)
+    max_output_tokens: Optional[int] = Field(None, ge=1, le=8192)
+
+
 class ChatRequest(BaseModel):
     prompt: str = Field(..., example="How can I reduce food wastage at home?")
+    generation_config: Optional[GenerationOverrides] = None
 
 class ChatResponse(BaseModel):
     response: str
@@ -163,11 +250,20 @@ class DonationOut(BaseModel):
     accepted_at: Optional[datetime] = None
 
 
+class DailyDonationCount(BaseModel):
+    """Number of donations created on one (UTC) day."""
+    date: str
+    count: int
+
+
 class DonationStats(BaseModel):
     """Model for dashboard statistics."""
     total_donations: int
     pending_donations: int
     accepted_donations: int
+    rejected_donations: int = 0
+    by_status: Dict[str, int] = {}
+    by_day: List[DailyDonationCount] = []
 
 # --------------------------------------------------------------------------
 # --- Helper Functions ---
@@ -175,6 +271,10 @@ class DonationStats(BaseModel):
 
 def ensure_db():
     """Ensure Firestore is initialized; otherwise raise server error."""
+    global db
+    if db is None:
+        # Retried at most every FIREBASE_INIT_RETRY seconds by the bootstrap
+        db = firebase_state.get_async_client()
     if db is None:
         raise HTTPException(
             status_code=500,
@@ -194,11 +294,10 @@ def firestore_ts_to_datetime(value):
     return None
 
 
-def donation_doc_to_model(doc) -> DonationOut:
-    """Convert Firestore doc to DonationOut model."""
-    data = doc.to_dict()
+def donation_dict_to_model(doc_id: str, data: dict) -> DonationOut:
+    """Convert a Firestore donation dict to DonationOut model."""
     return DonationOut(
-        id=doc.id,
+        id=doc_id,
         donor_name=data.get("donor_name", ""),
         donor_email=data.get("donor_email", ""),
         food_name=data.get("food_name", ""),
@@ -216,30 +315,164 @@ def donation_doc_to_model(doc) -> DonationOut:
         accepted_at=firestore_ts_to_datetime(data.get("accepted_at")),
     )
 
+
+def donation_doc_to_model(doc) -> DonationOut:
+    """Convert Firestore doc to DonationOut model."""
+    return donation_dict_to_model(doc.id, doc.to_dict())
+
 # --------------------------------------------------------------------------
 # --- Root Endpoint ---
 # --------------------------------------------------------------------------
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Annapurna FoodBridge Backend is running."}
 
+
+@app.get("/health", tags=["Health"])
+async def health(response: Response):
+    """Readiness probe: 503 until Firestore is initialized."""
+    state = firebase_state.health()
+    if not state["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return state
+
 # --------------------------------------------------------------------------
 # --- CHAT ENDPOINT ---
 # --------------------------------------------------------------------------
 
+def client_key(http_request: Request) -> str:
+    """Per-client rate limiting key."""
+    return http_request.client.host if http_request.client else "unknown"
+
+
+def chat_error(error: Exception, model_pool: ModelPool) -> HTTPException:
+    """Map a failed chat call to an HTTP error, with Retry-After when waiting helps."""
+    if isinstance(error, HTTPException):
+        return error
+    if isinstance(error, RateLimited):
+        retry_after = math.ceil(error.retry_after)
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many chat requests. Please retry in about {retry_after} seconds.",
+            headers={"Retry-After": str(retry_after)},
+        )
+    if isinstance(error, ResourceExhausted):
+        # Hold everyone back until the upstream quota recovers
+        model_pool.limiter.pause(CHAT_QUOTA_BACKOFF)
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI assistant is over its quota. Please try again shortly.",
+            headers={"Retry-After": str(math.ceil(CHAT_QUOTA_BACKOFF))},
+        )
+    return HTTPException(
+        status_code=500,
+        detail=f"Error communicating with AI model: {str(error)}"
+    )
+
+
 @app.post("/api/chat", response_model=ChatResponse, tags=["AI Chat"])
-def chat_with_gemini(request: ChatRequest):
-    """Receives a prompt and returns a response from the Gemini AI model."""
+async def chat_with_gemini(request: ChatRequest, http_request: Request, response: Response):
+    """
+    Receives a prompt and returns a response from the Gemini AI model.
+    Requests over the per-client or global budget get 429 with Retry-After;
+    queued ones report their estimated wait in X-Queue-Wait (seconds).
+    """
+    model_pool: ModelPool = http_request.app.state.model_pool
+    overrides = request.generation_config.model_dump(exclude_none=True) if request.generation_config else None
+    cache_namespace = chat_cache_namespace(model_pool.default_model, overrides)
+    cached = response_cache.get(request.prompt, cache_namespace)
+    if cached:
+        return {"response": cached}
+    coalesce_key = (cache_namespace, normalize_prompt(request.prompt) or request.prompt)
     try:
-        model = genai.GenerativeModel("gemini-1.5-pro-latest")
-        response = model.generate_content(request.prompt)
-        return {"response": response.text}
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error communicating with AI model: {str(e)}"
+        queue_wait = await model_pool.limiter.acquire_async(client_key(http_request), use_global=False)
+        queue_wait += model_pool.limiter.estimate()
+        response_text = await model_pool.coalescer.run(
+            coalesce_key, lambda: model_pool.generate(request.prompt, overrides)
         )
+    except Exception as e:
+        raise chat_error(e, model_pool)
+    response_cache.set(request.prompt, response_text, cache_namespace)
+    if queue_wait:
+        response.headers["X-Queue-Wait"] = f"{queue_wait:.1f}"
+    return {"response": response_text}
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/chat/stream", tags=["AI Chat"])
+async def stream_chat_with_gemini(request: ChatRequest, http_request: Request):
+    """
+    Same as /api/chat, streamed as Server-Sent Events: one `data: {"text": ...}`
+    message per chunk, then `event: done` (or `event: error` if the model
+    fails mid-stream). A request that has to queue first gets
+    `event: queued` with `{"wait_seconds": ...}` before its first chunk.
+    """
+    model_pool: ModelPool = http_request.app.state.model_pool
+    overrides = request.generation_config.model_dump(exclude_none=True) if request.generation_config else None
+    cache_namespace = chat_cache_namespace(model_pool.default_model, overrides)
+    cached = response_cache.get(request.prompt, cache_namespace)
+    if cached:
+        return sse_response(iter([sse_event({"text": cached}), sse_event({}, event="done")]))
+
+    try:
+        client_wait = model_pool.limiter.reserve(client_key(http_request), use_global=False)
+    except RateLimited as e:
+        raise chat_error(e, model_pool)
+    coalesce_key = (cache_namespace, normalize_prompt(request.prompt) or request.prompt)
+
+    async def open_reader():
+        await asyncio.sleep(client_wait)
+        # Identical prompts in flight share one upstream stream
+        return model_pool.coalescer.share_stream(
+            coalesce_key, lambda: model_pool.stream(request.prompt, overrides)
+        ).read()
+
+    async def relay(reader, first: Optional[str] = None):
+        parts = []
+        try:
+            if first is not None:
+                parts.append(first)
+                yield sse_event({"text": first})
+            async for text in reader:
+                parts.append(text)
+                yield sse_event({"text": text})
+            response_cache.set(request.prompt, "".join(parts), cache_namespace)
+            yield sse_event({}, event="done")
+        except Exception as e:
+            yield sse_event({"detail": chat_error(e, model_pool).detail}, event="error")
+
+    queue_wait = client_wait + model_pool.limiter.estimate()
+    if queue_wait < 1:
+        # Start now so busy/setup errors are still returned as HTTP errors
+        reader = await open_reader()
+        try:
+            first = await reader.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except Exception as e:
+            raise chat_error(e, model_pool)
+        return sse_response(relay(reader, first))
+
+    async def queued():
+        yield sse_event({"wait_seconds": round(queue_wait, 1)}, event="queued")
+        async for event in relay(await open_reader()):
+            yield event
+
+    return sse_response(queued())
+
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # --------------------------------------------------------------------------
 # --- DONATION ENDPOINTS (Firestore) ---
@@ -251,7 +484,7 @@ def chat_with_gemini(request: ChatRequest):
     status_code=status.HTTP_201_CREATED,
     tags=["Donations"],
 )
-def create_donation(donation: DonationCreate):
+async def create_donation(donation: DonationCreate):
     """
     Create a new donation in Firestore.
     This mirrors the data structure used in your Donor Streamlit app.
@@ -274,8 +507,9 @@ def create_donation(donation: DonationCreate):
     }
 
     try:
-        doc_ref = db.collection("donations").add(donation_data)[1]  # (write_result, reference)
-        saved_doc = doc_ref.get()
+        # Also bumps the donation count shown on the Admin dashboard
+        doc_ref = await create_counted_async(db, "donations", donation_data)
+        saved_doc = await doc_ref.get()
         return donation_doc_to_model(saved_doc)
     except Exception as e:
         raise HTTPException(
@@ -284,22 +518,60 @@ def create_donation(donation: DonationCreate):
         )
 
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_page_token(doc_id: str) -> str:
+    return base64.urlsafe_b64encode(doc_id.encode("utf-8")).decode("ascii")
+
+
+def decode_page_token(token: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid page_token.",
+        )
+
+
 @app.get("/api/donations", response_model=List[DonationOut], tags=["Donations"])
-def get_available_donations():
+async def get_available_donations(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = Query(None),
+):
     """
-    Returns all 'Pending' donations from Firestore.
+    Returns one page of 'Pending' donations from Firestore, newest first.
     This is equivalent to your NGO portal's get_available_donations().
+
+    Keyset pagination: pass the `X-Next-Page-Token` response header back as
+    `page_token` to fetch the next page. Requires the composite index on
+    (status ASC, created_at DESC) from firestore.indexes.json.
     """
     db = ensure_db()
     try:
-        query = db.collection("donations").where("status", "==", "Pending").stream()
-        donations = [donation_doc_to_model(doc) for doc in query]
-        # Sort by created_at desc (if available)
-        donations.sort(
-            key=lambda d: d.created_at or datetime.min,
-            reverse=True,
+        query = (
+            db.collection("donations")
+            .where("status", "==", "Pending")
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
         )
-        return donations
+        if page_token:
+            cursor = await db.collection("donations").document(decode_page_token(page_token)).get()
+            if not cursor.exists:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="page_token refers to a donation that no longer exists.",
+                )
+            query = query.start_after(cursor)
+
+        docs = [doc async for doc in query.limit(limit).stream()]
+        if len(docs) == limit:
+            response.headers["X-Next-Page-Token"] = encode_page_token(docs[-1].id)
+        return [donation_doc_to_model(doc) for doc in docs]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -312,44 +584,30 @@ def get_available_donations():
     response_model=DonationOut,
     tags=["Donations"],
 )
-def accept_donation(donation_id: str, ngo_details: NgoAcceptRequest):
+async def accept_donation(donation_id: str, ngo_details: NgoAcceptRequest):
     """
     NGO accepts a donation.
-    This updates the Firestore document exactly the same way
-    as your Streamlit NGO accept_donation() function.
+    Shares utils/donations.accept_donation with the Streamlit NGO portal:
+    one read plus one preconditioned write, so concurrent accepts of the
+    same donation get 409 instead of both succeeding.
     """
     db = ensure_db()
     try:
-        doc_ref = db.collection("donations").document(donation_id)
-        doc = doc_ref.get()
-        if not doc.exists:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Donation not found."
-            )
-
-        data = doc.to_dict()
-        current_status = data.get("status", "Pending")
-
-        if current_status != "Pending":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Donation is already {current_status} and cannot be accepted.",
-            )
-
-        # Update status and NGO info
-        doc_ref.update({
-            "status": "Accepted",
-            "accepted_by_ngo": ngo_details.ngo_name,
-            "accepted_by_email": ngo_details.ngo_contact_email,
-            "accepted_at": firestore.SERVER_TIMESTAMP,
-        })
-
-        updated_doc = doc_ref.get()
-        return donation_doc_to_model(updated_doc)
+        data = await donations_service.accept_donation_async(
+            db, donation_id, ngo_details.ngo_name, ngo_details.ngo_contact_email
+        )
+        return donation_dict_to_model(data["id"], data)
 
-    except HTTPException:
-        raise
+    except donations_service.DonationNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Donation not found."
+        )
+    except donations_service.DonationUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -360,30 +618,54 @@ def accept_donation(donation_id: str, ngo_details: NgoAcceptRequest):
 # --- STATS ENDPOINT ---
 # --------------------------------------------------------------------------
 
+DONATION_STATUSES = ("Pending", "Accepted", "Rejected")
+
+
+async def count_query(query) -> int:
+    """Run a Firestore count() aggregation (billed per 1000 index entries, not per doc)."""
+    result = await query.count(alias="count").get()
+    return int(result[0][0].value)
+
+
 @app.get("/api/donations/stats", response_model=DonationStats, tags=["Dashboard"])
-def get_donation_stats():
+async def get_donation_stats(days: int = Query(7, ge=0, le=31)):
     """
     Provides aggregated data about all donations.
-    Uses simple in-memory counting over Firestore results.
+    Uses Firestore count() aggregation queries, so the cost does not grow
+    with the number of donation documents. `days` controls the per-day
+    breakdown (UTC days, most recent last).
     """
     db = ensure_db()
+    donations = db.collection("donations")
+
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    day_starts = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+
+    queries = {"total": donations}
+    for status_val in DONATION_STATUSES:
+        queries[status_val] = donations.where("status", "==", status_val)
+    for start in day_starts:
+        queries[start.date().isoformat()] = (
+            donations.where("created_at", ">=", start)
+            .where("created_at", "<", start + timedelta(days=1))
+        )
+
     try:
-        docs = list(db.collection("donations").stream())
-        total = len(docs)
-        pending = 0
-        accepted = 0
-
-        for doc in docs:
-            status_val = doc.to_dict().get("status", "Pending")
-            if status_val == "Pending":
-                pending += 1
-            elif status_val == "Accepted":
-                accepted += 1
+        # Aggregations are independent round trips; run them concurrently
+        results = await asyncio.gather(*(count_query(q) for q in queries.values()))
+        counts = dict(zip(queries, results))
 
+        by_status = {status_val: counts[status_val] for status_val in DONATION_STATUSES}
         return DonationStats(
-            total_donations=total,
-            pending_donations=pending,
-            accepted_donations=accepted,
+            total_donations=counts["total"],
+            pending_donations=by_status["Pending"],
+            accepted_donations=by_status["Accepted"],
+            rejected_donations=by_status["Rejected"],
+            by_status=by_status,
+            by_day=[
+                DailyDonationCount(date=start.date().isoformat(), count=counts[start.date().isoformat()])
+                for start in day_starts
+            ],
         )
     except Exception as e:
         raise HTTPException(
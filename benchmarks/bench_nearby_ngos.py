@@ -0,0 +1,126 @@
+"""
+Benchmark nearby-NGO search: linear geodesic loop vs. vectorized haversine
+vs. the grid spatial index. "index update" is the cost of applying one
+changed NGO document to the index, which is all a change costs a search.
+
+Usage (from the project root):
+    python benchmarks/bench_nearby_ngos.py
+    python benchmarks/bench_nearby_ngos.py --sizes 1000 10000 100000 --radius 15
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.distance import haversine_km, nearest  # noqa: E402
+from utils.spatial_index import CollectionIndex  # noqa: E402
+
+try:
+    from geopy.distance import geodesic
+except ImportError:
+    geodesic = None
+
+# Rough bounding box around India
+LAT_RANGE = (8.0, 35.0)
+LNG_RANGE = (68.0, 97.0)
+# Jabalpur, used as the donor location
+ORIGIN = (23.1815, 79.9864)
+
+
+def make_ngos(n, seed=42):
+    rng = random.Random(seed)
+    ngos = []
+    for i in range(n):
+        # Cluster half the NGOs around major cities for a realistic density
+        if i % 2 == 0:
+            lat = ORIGIN[0] + rng.gauss(0, 0.5)
+            lng = ORIGIN[1] + rng.gauss(0, 0.5)
+        else:
+            lat = rng.uniform(*LAT_RANGE)
+            lng = rng.uniform(*LNG_RANGE)
+        ngos.append({"id": f"ngo-{i}", "lat": lat, "lng": lng})
+    return ngos
+
+
+def linear_search(ngos, origin, radius_km, distance_fn):
+    results = []
+    for ngo in ngos:
+        distance = distance_fn(origin, (ngo["lat"], ngo["lng"]))
+        if distance <= radius_km:
+            results.append((ngo["id"], distance))
+    results.sort(key=lambda r: r[1])
+    return results
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--radius", type=float, default=15.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if geodesic is not None:
+        baseline_name = "geodesic loop"
+        baseline_fn = lambda a, b: geodesic(a, b).kilometers  # noqa: E731
+    else:
+        print("geopy not installed; baseline uses a pure-Python haversine loop")
+        baseline_name = "haversine loop"
+        baseline_fn = lambda a, b: haversine_km(a[0], a[1], b[0], b[1])  # noqa: E731
+
+    print(
+        f"{'NGOs':>8} | {baseline_name:>16} | {'numpy scan':>12}"
+        f" | {'index build':>12} | {'index update':>12} | {'index query':>12} | {'hits':>5}"
+    )
+    print("-" * 96)
+    for n in args.sizes:
+        ngos = make_ngos(n)
+
+        loop_time, loop_hits = timed(
+            lambda: linear_search(ngos, ORIGIN, args.radius, baseline_fn), args.repeat
+        )
+
+        lats = [ngo["lat"] for ngo in ngos]
+        lngs = [ngo["lng"] for ngo in ngos]
+        numpy_time, _ = timed(
+            lambda: nearest(ORIGIN, lats, lngs, max_km=args.radius), args.repeat
+        )
+
+        locations = CollectionIndex(lambda ngo: (ngo["lat"], ngo["lng"]))
+        index = locations.index
+        start = time.perf_counter()
+        locations.apply({ngo["id"]: ngo for ngo in ngos}, reset=True)
+        build_time = time.perf_counter() - start
+
+        moved = dict(ngos[0], lat=ORIGIN[0], lng=ORIGIN[1])
+        update_time, _ = timed(lambda: locations.apply({moved["id"]: moved}), args.repeat)
+
+        query_time, index_hits = timed(
+            lambda: index.query_radius(ORIGIN, args.radius), args.repeat
+        )
+
+        # Haversine and geodesic disagree by <0.5%; only borderline hits may differ
+        if abs(len(loop_hits) - len(index_hits)) > max(2, len(loop_hits) // 100):
+            print(f"⚠️ Result mismatch at n={n}: loop={len(loop_hits)} index={len(index_hits)}")
+
+        print(
+            f"{n:>8} | {loop_time * 1000:>13.2f} ms | {numpy_time * 1000:>9.3f} ms"
+            f" | {build_time * 1000:>9.2f} ms | {update_time * 1000:>9.3f} ms"
+            f" | {query_time * 1000:>9.3f} ms | {len(index_hits):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
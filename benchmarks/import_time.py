@@ -0,0 +1,143 @@
+"""
+Measure the cold-start import time of each Streamlit page.
+
+For Annapurna.py and every pages/*.py, the page's top-level imports are
+run in a fresh `python -X importtime` interpreter (so nothing is cached
+in sys.modules) and the cumulative time of each top-level import is
+summed. Reports the median over --runs and the heaviest packages, which
+is what a visitor waits for before the page's first paint.
+
+Run from the project root:
+    python benchmarks/import_time.py --runs 5 --save after.json
+
+To compare before/after, run the same on the older revision with
+`--save before.json`, then:
+    python benchmarks/import_time.py --compare before.json after.json
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def page_files():
+    return [PROJECT_ROOT / "Annapurna.py"] + sorted((PROJECT_ROOT / "pages").glob("*.py"))
+
+
+def top_level_imports(path):
+    """Source of the page's module-level import statements, in order."""
+    source = path.read_text(encoding="utf-8")
+    return "\n".join(
+        ast.get_source_segment(source, node)
+        for node in ast.parse(source).body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def measure(source, startup=frozenset()):
+    """
+    One cold run: total milliseconds and cumulative ms per top-level
+    package, leaving out `startup` (what the bare interpreter imports).
+    """
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT), PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", source],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    packages = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # One leading space marks an import made directly by the page
+        if match and len(match.group(3)) == 1 and match.group(4) not in startup:
+            packages[match.group(4)] = int(match.group(2)) / 1000
+    return sum(packages.values()), packages
+
+
+def run(runs, top):
+    startup = frozenset(measure("pass")[1])
+    results = []
+    for path in page_files():
+        source = top_level_imports(path)
+        totals = []
+        packages = defaultdict(list)
+        try:
+            for _ in range(runs):
+                total, per_package = measure(source, startup)
+                totals.append(total)
+                for name, ms in per_package.items():
+                    packages[name].append(ms)
+        except RuntimeError as e:
+            print(f"{path.name}: import failed ({e})", file=sys.stderr)
+            continue
+        heaviest = sorted(
+            ((name, statistics.median(ms)) for name, ms in packages.items()),
+            key=lambda item: item[1], reverse=True,
+        )[:top]
+        results.append({
+            "page": path.name,
+            "runs": runs,
+            "median_ms": statistics.median(totals),
+            "min_ms": min(totals),
+            "heaviest": [{"package": name, "ms": ms} for name, ms in heaviest],
+        })
+    return results
+
+
+def print_results(results):
+    print(f"{'page':<28} | {'median ms':>9} | {'min ms':>8} | heaviest imports")
+    print("-" * 90)
+    for r in results:
+        heaviest = ", ".join(f"{h['package']} {h['ms']:.0f}" for h in r["heaviest"])
+        print(f"{r['page']:<28} | {r['median_ms']:>9.1f} | {r['min_ms']:>8.1f} | {heaviest}")
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = {r["page"]: r for r in json.load(f)}
+    with open(after_path) as f:
+        after = {r["page"]: r for r in json.load(f)}
+    print(f"{'page':<28} | {'before ms':>9} | {'after ms':>9} | {'speedup':>8}")
+    print("-" * 65)
+    for name in after:
+        if name in before:
+            b, a = before[name]["median_ms"], after[name]["median_ms"]
+            print(f"{name:<28} | {b:>9.1f} | {a:>9.1f} | {b / a if a else float('inf'):>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Cold runs per page")
+    parser.add_argument("--top", type=int, default=4, help="Heaviest imports listed per page")
+    parser.add_argument("--save", help="Write results as JSON to this path")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two saved result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(args.runs, args.top)
+    print_results(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
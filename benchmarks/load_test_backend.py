@@ -0,0 +1,204 @@
+"""
+Load-test the FastAPI backend's donation endpoints against the Firestore emulator.
+
+Measures requests/sec and latency percentiles for:
+  - list:   GET  /api/donations
+  - create: POST /api/donations
+  - accept: PUT  /api/donations/{id}/accept  (on donations created during setup)
+
+With --chat, also the AI chat endpoints (unique prompts, so the answer
+cache never short-circuits them):
+  - chat:   POST /api/chat
+  - stream: POST /api/chat/stream  (p50/p95 measured to the first event)
+
+Setup:
+    # 1. Start the Firestore emulator
+    gcloud emulators firestore start --host-port=localhost:8080
+    # 2. Start the backend pointed at it (from backend/)
+    export FIRESTORE_EMULATOR_HOST=localhost:8080 GOOGLE_CLOUD_PROJECT=demo-annapurna
+    uvicorn main:app --port 8000
+    # For --chat without Gemini quota, also set the offline model stand-in,
+    # and lift the chat rate limits: every load-test request comes from one
+    # IP, so the per-client budget would otherwise answer most of them 429
+    #   export LLM_BACKEND=fake FAKE_LLM_LATENCY=0.3 FAKE_LLM_TOKEN_DELAY=0.02
+    #   export CHAT_RATE_PER_USER_RPM=0 CHAT_RATE_GLOBAL_RPM=0
+    # 3. Run the load test (from the project root)
+    python benchmarks/load_test_backend.py --save after.json
+
+To compare before/after, run the same steps on the older revision with
+`--save before.json`, then:
+    python benchmarks/load_test_backend.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+
+def donation_payload(i):
+    return {
+        "donor_name": f"Load Test Donor {i}",
+        "donor_email": f"loadtest+{i}@example.com",
+        "food_name": "Rice and Dal",
+        "quantity": 20,
+        "food_type": "Veg",
+        "expiry_date": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+        "contact_number": "+91-9000000000",
+        "address": "Adhartal, Jabalpur",
+        "description": "load test",
+    }
+
+
+async def run_scenario(name, make_request, total, concurrency):
+    """Fire `total` requests with at most `concurrency` in flight."""
+    latencies = []
+    errors = 0
+    # 429s are the rate limiter at work, not failures of the stack under test
+    limited = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors, limited
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await make_request(i)
+                if response.status_code == 429:
+                    limited += 1
+                elif response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": total,
+        "errors": errors,
+        "limited": limited,
+        "rps": total / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def chat_payload(i):
+    return {"prompt": f"[{uuid.uuid4().hex}] load test {i}: how do I donate surplus food?"}
+
+
+async def first_event(client, i):
+    """Open the SSE stream and return as soon as the first event arrives."""
+    async with client.stream("POST", "/api/chat/stream", json=chat_payload(f"stream-{i}")) as response:
+        async for _ in response.aiter_bytes():
+            break
+    return response
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=30, limits=limits) as client:
+        results = []
+
+        results.append(await run_scenario(
+            "create",
+            lambda i: client.post("/api/donations", json=donation_payload(i)),
+            args.requests, args.concurrency,
+        ))
+
+        results.append(await run_scenario(
+            "list",
+            lambda i: client.get("/api/donations"),
+            args.requests, args.concurrency,
+        ))
+
+        # Setup for accept: fresh Pending donations, one accept each
+        created = await asyncio.gather(*(
+            client.post("/api/donations", json=donation_payload(f"accept-{i}"))
+            for i in range(args.requests)
+        ))
+        ids = [r.json()["id"] for r in created if r.status_code == 201]
+        ngo = {"ngo_name": "Load Test NGO", "ngo_contact_email": f"ngo-{uuid.uuid4().hex[:8]}@example.com"}
+        results.append(await run_scenario(
+            "accept",
+            lambda i: client.put(f"/api/donations/{ids[i]}/accept", json=ngo),
+            len(ids), args.concurrency,
+        ))
+
+        if args.chat:
+            results.append(await run_scenario(
+                "chat",
+                lambda i: client.post("/api/chat", json=chat_payload(i)),
+                args.requests, args.concurrency,
+            ))
+            results.append(await run_scenario(
+                "stream",
+                lambda i: first_event(client, i),
+                args.requests, args.concurrency,
+            ))
+
+    return results
+
+
+def print_results(results, label=""):
+    if label:
+        print(f"\n== {label} ==")
+    print(f"{'scenario':>8} | {'req':>5} | {'err':>4} | {'429':>4} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8}")
+    print("-" * 64)
+    for r in results:
+        print(
+            f"{r['scenario']:>8} | {r['requests']:>5} | {r['errors']:>4} | {r.get('limited', 0):>4}"
+            f" | {r['rps']:>8.1f} | {r['p50_ms']:>8.1f} | {r['p95_ms']:>8.1f}"
+        )
+    if any(r.get("limited") for r in results):
+        print("\n⚠️ Some requests were rate limited (429); their latencies are not the chat stack's."
+              " Set CHAT_RATE_PER_USER_RPM=0 CHAT_RATE_GLOBAL_RPM=0 on the server to measure it.")
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = {r["scenario"]: r for r in json.load(f)}
+    with open(after_path) as f:
+        after = {r["scenario"]: r for r in json.load(f)}
+    print(f"{'scenario':>8} | {'before req/s':>12} | {'after req/s':>12} | {'speedup':>8}")
+    print("-" * 50)
+    for name in after:
+        if name in before:
+            b, a = before[name]["rps"], after[name]["rps"]
+            print(f"{name:>8} | {b:>12.1f} | {a:>12.1f} | {a / b if b else float('inf'):>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--chat", action="store_true", help="Also load-test the AI chat endpoints")
+    parser.add_argument("--save", help="Write results as JSON to this path")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two saved result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = asyncio.run(main_async(args))
+    print_results(results, label=args.url)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,25 @@
-import google.generativeai as genai
+import os
+import re
+import json
+import time
 import logging
-from typing import List, Dict
+import threading
+import uuid
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, FrozenSet, Hashable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+from utils.lazy_imports import genai
+from utils.llm_backends import LLMBackend, ResponseBlocked, create_backend, use_fake_backend
+from utils.rate_limit import Coalescer, RateLimited, RateLimiter
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-
-class AnniChatbot:
-    """A chatbot assistant for the Annapurna food donation platform."""
-
-    def __init__(self, api_key: str):
-        if not api_key or not isinstance(api_key, str) or not api_key.strip():
-            logger.error("No API key provided")
-            raise ValueError("A valid Google Gemini API key is required")
-
-        try:
-            genai.configure(api_key=api_key.strip())
-            logger.info("API key configured successfully")
-
-            # Enhanced system prompt for Anni with stricter guidelines
-            self.system_prompt = """
+# Enhanced system prompt for Anni with stricter guidelines
+SYSTEM_PROMPT = """
 You are Anni, a helpful and friendly chatbot assistant for Annapurna - 
 a food donation platform that connects donors with NGOs to reduce food waste 
 and help those in need.
@@ -129,108 +128,450 @@ Example topics you CANNOT help with:
 Always stay focused on Annapurna's mission of connecting food donors with those in need! 🌾💖
 """.strip()
 
-            generation_config = {
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "top_k": 40,
-                "max_output_tokens": 800,
-            }
-
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT",
-                 "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH",
-                 "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                 "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                 "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            ]
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "top_k": 40,
+    "max_output_tokens": 800,
+}
+
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT",
+     "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH",
+     "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+     "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+     "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+]
+
+# Priority order of model preferences (use actual available model names)
+PREFERRED_MODELS = [
+    "models/gemini-2.5-flash",
+    "models/gemini-2.0-flash",
+    "models/gemini-flash-latest",
+    "models/gemini-2.5-pro",
+    "models/gemini-2.0-flash-001",
+    "models/gemini-pro-latest",
+]
+
+# How long a selected model is trusted before re-selection, and how often
+# the background thread re-checks it (metadata calls only, no tokens)
+MODEL_REGISTRY_TTL = float(os.getenv("ANNI_MODEL_REGISTRY_TTL", "21600"))
+MODEL_HEALTH_CHECK_INTERVAL = float(os.getenv("ANNI_MODEL_HEALTH_CHECK_INTERVAL", "600"))
+MODEL_REGISTRY_PATH = Path(
+    os.getenv("ANNI_MODEL_REGISTRY_PATH")
+    or Path(__file__).parent / ".cache" / "anni_model.json"
+)
+
+
+class ModelRegistry:
+    """
+    Process-wide, TTL-cached choice of the Gemini model Anni uses.
+
+    The last working model is remembered in memory and on disk, so new
+    sessions get it without any network call. A daemon thread re-checks it
+    periodically with genai.get_model() (a free metadata call) and falls
+    back to the next candidate when it disappears.
+    """
+
+    def __init__(self, preferred_models: List[str], ttl: float, health_interval: float, path: Path):
+        self.preferred_models = preferred_models
+        self.ttl = ttl
+        self.health_interval = health_interval
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._model_name: Optional[str] = None
+        self._selected_at = 0.0
+        self._failed: Dict[str, float] = {}
+        self._health_thread: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if time.time() - data.get("selected_at", 0) < self.ttl:
+                self._model_name = data.get("model_name")
+                self._selected_at = time.monotonic() - (time.time() - data["selected_at"])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not read model registry {self.path}: {e}")
 
-            # Get list of actually available models
-            try:
-                available_models = [
-                    m.name for m in genai.list_models()
-                    if hasattr(m, "supported_generation_methods") and 
-                    "generateContent" in m.supported_generation_methods
-                ]
-                logger.info(f"Available models: {available_models}")
-            except Exception as e_ls:
-                available_models = []
-                logger.warning(f"Could not list models: {e_ls}")
-
-            # Priority order of model preferences (use actual available model names)
-            preferred_models = [
-                "models/gemini-2.5-flash",
-                "models/gemini-2.0-flash",
-                "models/gemini-flash-latest",
-                "models/gemini-2.5-pro",
-                "models/gemini-2.0-flash-001",
-                "models/gemini-pro-latest",
-            ]
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"model_name": self._model_name, "selected_at": time.time()}, f)
+        except Exception as e:
+            logger.warning(f"Could not write model registry {self.path}: {e}")
 
-            # Filter to only use models that are actually available
-            models_to_try = []
-            if available_models:
-                # First try preferred models that are available
-                for model in preferred_models:
-                    if model in available_models:
+    def _candidates(self) -> List[str]:
+        # Get list of actually available models
+        try:
+            available_models = [
+                m.name for m in genai.list_models()
+                if hasattr(m, "supported_generation_methods") and
+                "generateContent" in m.supported_generation_methods
+            ]
+            logger.info(f"Available models: {available_models}")
+        except Exception as e_ls:
+            available_models = []
+            logger.warning(f"Could not list models: {e_ls}")
+
+        if not available_models:
+            # Fallback if can't list models
+            return list(self.preferred_models)
+
+        # First try preferred models that are available
+        models_to_try = [m for m in self.preferred_models if m in available_models]
+
+        # If no preferred models available, try any available model with 'flash' or 'pro' in name
+        if not models_to_try:
+            for model in available_models:
+                if 'flash' in model.lower() or 'pro' in model.lower():
+                    if 'tts' not in model.lower() and 'image' not in model.lower():
                         models_to_try.append(model)
-                
-                # If no preferred models available, try any available model with 'flash' or 'pro' in name
-                if not models_to_try:
-                    for model in available_models:
-                        if 'flash' in model.lower() or 'pro' in model.lower():
-                            if 'tts' not in model.lower() and 'image' not in model.lower():
-                                models_to_try.append(model)
-                                if len(models_to_try) >= 5:
-                                    break
-            else:
-                # Fallback if can't list models
-                models_to_try = preferred_models
+                        if len(models_to_try) >= 5:
+                            break
+        return models_to_try
+
+    def select(self) -> str:
+        """Return the model to use, resolving it only when unknown or expired."""
+        with self._lock:
+            if self._model_name and time.monotonic() - self._selected_at < self.ttl:
+                self._start_health_checks()
+                return self._model_name
+
+            now = time.monotonic()
+            candidates = [
+                m for m in self._candidates()
+                if now - self._failed.get(m, -self.ttl) >= self.ttl
+            ]
+            if not candidates:
+                raise Exception("Could not initialize any Gemini model: no candidate models available")
+
+            self._model_name = candidates[0]
+            self._selected_at = now
+            self._save()
+            logger.info(f"Selected model: {self._model_name} (candidates: {candidates})")
+            self._start_health_checks()
+            return self._model_name
+
+    def mark_failed(self, model_name: str) -> None:
+        """Stop using a model (e.g. after a 404) until the TTL passes."""
+        with self._lock:
+            self._failed[model_name] = time.monotonic()
+            if self._model_name == model_name:
+                self._model_name = None
+        logger.warning(f"Model marked as failed: {model_name}")
+
+    def _start_health_checks(self) -> None:
+        if self._health_thread is None or not self._health_thread.is_alive():
+            self._health_thread = threading.Thread(
+                target=self._health_loop, name="anni-model-health", daemon=True
+            )
+            self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        while True:
+            time.sleep(self.health_interval)
+            model_name = self._model_name
+            if not model_name:
+                continue
+            try:
+                genai.get_model(model_name)
+            except Exception as e:
+                logger.warning(f"Health check failed for {model_name}: {e}")
+                self.mark_failed(model_name)
+                try:
+                    self.select()
+                except Exception as e_sel:
+                    logger.error(f"Model re-selection failed: {e_sel}")
+
+
+model_registry = ModelRegistry(
+    PREFERRED_MODELS, MODEL_REGISTRY_TTL, MODEL_HEALTH_CHECK_INTERVAL, MODEL_REGISTRY_PATH
+)
+
+
+
+# Answer cache for repeated first-turn questions ("how do I donate?")
+FAQ_CACHE_TTL = float(os.getenv("ANNI_FAQ_CACHE_TTL", "86400"))
+FAQ_CACHE_SIZE = int(os.getenv("ANNI_FAQ_CACHE_SIZE", "512"))
+# Minimum character-trigram Jaccard similarity for a fuzzy hit; set to 1 for exact matches only
+FAQ_CACHE_SIMILARITY = float(os.getenv("ANNI_FAQ_CACHE_SIMILARITY", "0.85"))
+# Long prompts are rarely repeated verbatim; don't spend cache slots on them
+FAQ_CACHE_MAX_PROMPT_CHARS = 300
+
+# Greetings and function words that don't change what is being asked
+_FILLER_WORDS = {
+    "hi", "hello", "hey", "please", "pls", "anni", "kindly", "thanks", "thank",
+    "i", "me", "my", "we", "our", "you", "your", "a", "an", "the", "to", "of",
+    "for", "with", "in", "on", "do", "does", "can", "could", "would", "should",
+    "is", "are", "am",
+}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, drop punctuation, greetings and filler words, collapse whitespace."""
+    words = re.sub(r"[^\w\s]", " ", (prompt or "").lower()).split()
+    return " ".join(w for w in words if w not in _FILLER_WORDS)
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _numbers(text: str) -> Tuple[str, ...]:
+    return tuple(re.findall(r"\d+", text))
+
+
+class ResponseCache:
+    """
+    Process-wide TTL + LRU cache of Anni answers keyed by normalized prompt.
+
+    Lookups try an exact match first, then the most similar cached prompt
+    by character-trigram Jaccard similarity, so "How do I donate food?" and
+    "how can i donate food" share one answer. A fuzzy match must contain
+    the same numbers: "5 kg" and "50 kg" look alike but are different
+    questions. Entries are grouped by namespace so different models or
+    generation configs never mix.
+    """
+
+    def __init__(self, max_entries: int = FAQ_CACHE_SIZE, ttl: float = FAQ_CACHE_TTL,
+                 min_similarity: float = FAQ_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        # (namespace, normalized prompt) -> (expires at, trigrams, numbers, answer)
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[float, FrozenSet[str], Tuple[str, ...], str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cacheable(prompt: str) -> bool:
+        return bool(normalize_prompt(prompt)) and len(prompt) <= FAQ_CACHE_MAX_PROMPT_CHARS
+
+    def get(self, prompt: str, namespace: Hashable = "") -> Optional[str]:
+        if not self.cacheable(prompt):
+            return None
+        key = (namespace, normalize_prompt(prompt))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.min_similarity < 1:
+                grams = _trigrams(key[1])
+                numbers = _numbers(key[1])
+                best = 0.0
+                for other_key, other in self._entries.items():
+                    if other_key[0] != namespace or other[0] <= now or other[2] != numbers:
+                        continue
+                    score = len(grams & other[1]) / len(grams | other[1])
+                    if score >= self.min_similarity and score > best:
+                        best, key, entry = score, other_key, other
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[3]
+
+    def set(self, prompt: str, response: str, namespace: Hashable = "") -> None:
+        if not self.cacheable(prompt) or not response:
+            return
+        normalized = normalize_prompt(prompt)
+        with self._lock:
+            self._entries[(namespace, normalized)] = (
+                time.monotonic() + self.ttl, _trigrams(normalized), _numbers(normalized), response
+            )
+            self._entries.move_to_end((namespace, normalized))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+ANNI_CACHE_NAMESPACE = "anni"
+
+# Per-session and global request budgets in front of the model (CHAT_* settings),
+# and sharing of identical opening questions that are in flight at once
+chat_limiter = RateLimiter()
+prompt_coalescer = Coalescer()
+# A session waits at most this long for another session's identical question
+PROMPT_COALESCE_TIMEOUT = float(os.getenv("ANNI_PROMPT_COALESCE_TIMEOUT", "60"))
+
+
+# Conversation context sent to the model: recent turns kept verbatim, older
+# ones folded into a short summary
+HISTORY_MAX_TURNS = int(os.getenv("ANNI_HISTORY_MAX_TURNS", "6"))
+HISTORY_MAX_TOKENS = int(os.getenv("ANNI_HISTORY_MAX_TOKENS", "2000"))
+HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("ANNI_HISTORY_SUMMARY_MAX_CHARS", "1200"))
+# Messages kept for display; older ones are already part of the summary
+HISTORY_MAX_MESSAGES = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return len(text or "") // 4 + 1
+
+
+def _clip(text: str, limit: int) -> str:
+    text = re.sub(r"\s+", " ", (text or "").replace("**", "")).strip()
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+class ConversationHistory:
+    """
+    The one transcript of a chat, shown by the UI and sent to the model.
+
+    Every message is kept for display, but only the latest turns that fit
+    both the turn and token budgets go to the model verbatim. Older turns
+    are folded into a compact summary sent ahead of them, so each request
+    stays small no matter how long the chat runs.
+    """
+
+    def __init__(self, max_turns: int = HISTORY_MAX_TURNS, max_tokens: int = HISTORY_MAX_TOKENS,
+                 summary_max_chars: int = HISTORY_SUMMARY_MAX_CHARS):
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summary_max_chars = summary_max_chars
+        self.messages: List[Dict] = []
+        self.summary = ""
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def is_fresh(self) -> bool:
+        """True until the model has seen any turn of this conversation."""
+        return not self.summary and not any(m["in_context"] for m in self.messages)
+
+    def add_turn(self, user_message: str, reply: str, in_context: bool = True) -> None:
+        """
+        Record a question and Anni's reply. Pass in_context=False for failed
+        turns (error messages) that should be shown but not sent to the model.
+        """
+        now = datetime.now()
+        for role, content in (("user", user_message), ("bot", reply)):
+            self.messages.append({"role": role, "content": content, "timestamp": now, "in_context": in_context})
+        self._compact()
+        del self.messages[:-HISTORY_MAX_MESSAGES]
+
+    def clear(self) -> None:
+        self.messages = []
+        self.summary = ""
+
+    def _context_turns(self) -> List[Tuple[Dict, Dict]]:
+        in_context = [m for m in self.messages if m["in_context"]]
+        return list(zip(in_context[0::2], in_context[1::2]))
+
+    def _compact(self) -> None:
+        turns = self._context_turns()
+        tokens = sum(estimate_tokens(u["content"]) + estimate_tokens(r["content"]) for u, r in turns)
+        # Always keep the latest turn verbatim, even if it alone is over budget
+        while len(turns) > 1 and (len(turns) > self.max_turns or tokens > self.max_tokens):
+            user, reply = turns.pop(0)
+            tokens -= estimate_tokens(user["content"]) + estimate_tokens(reply["content"])
+            user["in_context"] = reply["in_context"] = False
+            self._summarize(user["content"], reply["content"])
+
+    def _summarize(self, user_message: str, reply: str) -> None:
+        # Extractive: the question and the opening of the answer, no model call
+        line = f"- User asked: {_clip(user_message, 120)} | Anni said: {_clip(reply, 160)}"
+        summary = f"{self.summary}\n{line}" if self.summary else line
+        # Drop the oldest lines once the memory outgrows its budget
+        while len(summary) > self.summary_max_chars and "\n" in summary:
+            summary = summary.split("\n", 1)[1]
+        self.summary = summary
+
+    def context(self) -> List[Dict]:
+        """Gemini `contents` for the conversation so far (summary first)."""
+        contents: List[Dict] = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [f"Summary of our earlier conversation:\n{self.summary}"]})
+            contents.append({"role": "model", "parts": ["Thanks, I'll keep that in mind."]})
+        for user, reply in self._context_turns():
+            contents.append({"role": "user", "parts": [user["content"]]})
+            contents.append({"role": "model", "parts": [reply["content"]]})
+        return contents
+
+
+def build_model(model_name: str) -> LLMBackend:
+    """Build Anni's model backend. The model is stateless and safe to share."""
+    return create_backend(
+        model_name,
+        generation_config=GENERATION_CONFIG,
+        safety_settings=SAFETY_SETTINGS,
+        system_instruction=SYSTEM_PROMPT,
+    )
+
+
+def _configure(api_key: str) -> None:
+    if not api_key or not isinstance(api_key, str) or not api_key.strip():
+        logger.error("No API key provided")
+        raise ValueError("A valid Google Gemini API key is required")
+    genai.configure(api_key=api_key.strip())
+
+
+def current_model_name(api_key: str) -> str:
+    """
+    The registry's current model choice ("fake" with LLM_BACKEND=fake).
+    Key shared models on it, so that once a session switches away from a
+    broken model, new sessions start on the replacement.
+    """
+    if use_fake_backend():
+        return "fake"
+    _configure(api_key)
+    return model_registry.select()
+
+
+def create_shared_model(api_key: str, model_name: Optional[str] = None) -> LLMBackend:
+    """
+    Configure Gemini and build the model for `model_name` (default: the
+    registry's current choice). Meant to be cached once per process and
+    model (e.g. with st.cache_resource) and passed to every session's
+    AnniChatbot. With LLM_BACKEND=fake no key or network is needed.
+    """
+    if use_fake_backend():
+        return build_model("fake")
+    _configure(api_key)
+    logger.info("API key configured successfully")
+    return build_model(model_name or model_registry.select())
 
-            logger.info(f"Will try these models in order: {models_to_try}")
 
-            self.model = None
-            self.chat = None
-            failures = []
+class AnniChatbot:
+    """A chatbot assistant for the Annapurna food donation platform."""
 
-            for model_name in models_to_try:
-                try:
-                    logger.info(f"Trying model: {model_name}")
-
-                    test_model = genai.GenerativeModel(
-                        model_name=model_name,
-                        generation_config=generation_config,
-                        safety_settings=safety_settings,
-                        system_instruction=self.system_prompt,
-                    )
-
-                    # Test if the model actually works
-                    test_chat = test_model.start_chat(history=[])
-                    test_response = test_chat.send_message("Hi")
-
-                    if hasattr(test_response, "text") and test_response.text:
-                        self.model = test_model
-                        self.model_name = model_name
-                        self.chat = self.model.start_chat(history=[])
-                        logger.info(f"✅ Successfully initialized and tested model: {model_name}")
-                        break
-
-                except Exception as e_try:
-                    msg = str(e_try)
-                    failures.append(f"{model_name}: {msg[:100]}")
-                    logger.warning(f"Failed with {model_name}: {msg[:100]}")
-                    continue
-
-            if not self.model or not self.chat:
-                details = " | ".join(failures[:3]) if failures else "No attempts recorded"
-                avail = ", ".join(available_models[:10]) if available_models else "(could not list)"
-                raise Exception(
-                    f"Could not initialize any Gemini model. "
-                    f"First 3 failures: {details}. "
-                    f"First 10 available models: {avail}"
-                )
+    def __init__(self, api_key: str, model=None, history: Optional[ConversationHistory] = None,
+                 session_key: Optional[str] = None):
+        """
+        Start a chat session. Pass a shared `model` from create_shared_model()
+        to skip model setup, and the session's `history` so the UI and the
+        model read the same transcript; only the conversation is per instance.
+        `session_key` identifies the user for rate limiting.
+        """
+        self.system_prompt = SYSTEM_PROMPT
+        self.session_key = session_key or uuid.uuid4().hex
+        try:
+            if model is None:
+                # Model choice comes from the process-wide registry: no list/probe
+                # round trips per session once a working model is known
+                model = create_shared_model(api_key)
+            self.model = model
+            self.model_name = model.model_name
+            self.history = history if history is not None else ConversationHistory()
 
             logger.info(f"AnniChatbot initialized successfully with model: {self.model_name}")
 
@@ -238,71 +579,240 @@ Always stay focused on Annapurna's mission of connecting food donors with those
             logger.error(f"Failed to initialize AnniChatbot: {str(e)}")
             raise Exception(f"Failed to initialize chatbot: {str(e)}")
 
+    def _switch_model(self) -> bool:
+        """Report the current model as broken and move to the next candidate."""
+        if use_fake_backend():
+            # The registry probes the live API; offline there is nothing to switch to
+            return False
+        model_registry.mark_failed(self.model_name)
+        try:
+            next_model = model_registry.select()
+        except Exception as e:
+            logger.error(f"No fallback model available: {e}")
+            return False
+        if next_model == self.model_name:
+            return False
+        self.model_name = next_model
+        self.model = build_model(next_model)
+        logger.info(f"Switched to model: {next_model}")
+        return True
+
+    @staticmethod
+    def _is_model_missing(error: Exception) -> bool:
+        error_msg = str(error)
+        return "404" in error_msg or "not found" in error_msg.lower()
+
+    @staticmethod
+    def _is_quota_error(error: Exception) -> bool:
+        error_msg = str(error).lower()
+        return not isinstance(error, RateLimited) and ("quota" in error_msg or "rate limit" in error_msg)
+
+    @staticmethod
+    def _error_response(error: Exception) -> str:
+        """User-facing message for a failed Gemini call."""
+        if isinstance(error, RateLimited):
+            return (
+                "⏳ Lots of people are chatting with me right now! "
+                f"Please try again in about {max(1, round(error.retry_after))} seconds."
+            )
+        if AnniChatbot._is_quota_error(error):
+            return "⏳ High demand! Please try again in a moment."
+        elif AnniChatbot._is_model_missing(error):
+            return (
+                "⚠️ Model unavailable. Please contact support:\n"
+                "📧 AnnapurnaFoodbridge@gmail.com\n"
+                "📞 +91 9630995163 | +91 7049302011"
+            )
+        return (
+            "I'm having trouble connecting right now. 😔 "
+            "Please try again in a moment or contact our support team at "
+            "AnnapurnaFoodbridge@gmail.com if the issue persists."
+        )
+
+    def _cached_first_turn(self, user_message: str) -> Optional[str]:
+        """
+        Serve an opening question from the shared answer cache. Later turns
+        depend on the conversation so far and always go to the model.
+        """
+        if not self.history.is_fresh():
+            return None
+        cached = response_cache.get(user_message, ANNI_CACHE_NAMESPACE)
+        if cached:
+            logger.info(f"Answer cache hit: {user_message[:50]}...")
+            # Keep the turn in the conversation so follow-ups have context
+            self.history.add_turn(user_message, cached)
+        return cached
+
+    def _contents(self, user_message: str) -> List[Dict]:
+        return self.history.context() + [{"role": "user", "parts": [user_message]}]
+
+    def estimated_wait(self) -> float:
+        """Seconds the next message would queue behind the rate limits."""
+        return chat_limiter.estimate(self.session_key, use_global=False) + chat_limiter.estimate()
+
+    def _claim(self, user_message: str, first_turn: bool):
+        """
+        Coalesce identical opening questions asked at the same time. Returns
+        (key, None) when this call should ask the model (and later finish the
+        key, if any), or (None, result) with the reply another session got.
+        """
+        if not first_turn:
+            return None, None
+        # Greetings normalize to "", so fall back to the raw text like the backend
+        key = normalize_prompt(user_message) or user_message
+        future, leader = prompt_coalescer.claim(key)
+        if leader:
+            return key, None
+        try:
+            result = future.result(timeout=PROMPT_COALESCE_TIMEOUT)
+        except FutureTimeoutError:
+            logger.warning("Timed out waiting for an identical in-flight question; asking on our own")
+            return None, None
+        # None means the other request was abandoned; ask on our own
+        return None, result
+
     def get_response(self, user_message: str) -> str:
-        """Get a response from the chatbot with enhanced context."""
+        """Get a response from the chatbot and record the turn in the history."""
         if not user_message or not isinstance(user_message, str) or not user_message.strip():
             return "I didn't receive your message. Could you please try again? 🤔"
 
+        cached = self._cached_first_turn(user_message)
+        if cached:
+            return cached
+
+        first_turn = self.history.is_fresh()
+        try:
+            chat_limiter.acquire(self.session_key, use_global=False)
+        except RateLimited as e:
+            response_text = self._error_response(e)
+            self.history.add_turn(user_message, response_text, in_context=False)
+            return response_text
+
+        key, result = self._claim(user_message, first_turn)
+        if result is None:
+            try:
+                result = self._generate(user_message)
+            finally:
+                if key is not None:
+                    prompt_coalescer.finish(key, result)
+        response_text, ok = result
+        if ok and first_turn:
+            response_cache.set(user_message, response_text, ANNI_CACHE_NAMESPACE)
+        self.history.add_turn(user_message, response_text, in_context=ok)
+        return response_text
+
+    def _generate(self, user_message: str, _retry: bool = True) -> Tuple[str, bool]:
+        """Returns (reply, ok); on failure the reply is a user-facing message."""
         try:
+            # Global budget: only calls that actually reach the model count
+            chat_limiter.acquire()
             logger.info(f"Sending message to {self.model_name}: {user_message[:50]}...")
             
-            response = self.chat.send_message(user_message)
+            response_text = self.model.generate(self._contents(user_message)).strip()
 
-            # Extract response text
-            if hasattr(response, "text") and response.text.strip():
-                response_text = response.text.strip()
+            if response_text:
                 logger.info(f"✅ Response received: {len(response_text)} characters")
-                return response_text
-            
-            if hasattr(response, 'prompt_feedback'):
-                logger.warning(f"Response blocked: {response.prompt_feedback}")
-                return "I couldn't generate a response due to safety filters. Could you rephrase? 🤔"
+                return response_text, True
 
-            return "I'm not sure how to respond to that. Could you ask about food donation, NGO registration, or volunteering with Annapurna? 🌾"
+            return "I'm not sure how to respond to that. Could you ask about food donation, NGO registration, or volunteering with Annapurna? 🌾", False
 
+        except ResponseBlocked as e:
+            logger.warning(str(e))
+            return "I couldn't generate a response due to safety filters. Could you rephrase? 🤔", False
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error generating response: {error_msg}")
-            
-            if "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
-                return "⏳ High demand! Please try again in a moment."
-            elif "404" in error_msg or "not found" in error_msg.lower():
-                return (
-                    "⚠️ Model unavailable. Please contact support:\n"
-                    "📧 AnnapurnaFoodbridge@gmail.com\n"
-                    "📞 +91 9630995163 | +91 7049302011"
-                )
-            else:
-                return (
-                    "I'm having trouble connecting right now. 😔 "
-                    "Please try again in a moment or contact our support team at "
-                    "AnnapurnaFoodbridge@gmail.com if the issue persists."
-                )
+            logger.error(f"Error generating response: {str(e)}")
+            if self._is_quota_error(e):
+                # Queue everyone behind the quota reset instead of piling on
+                chat_limiter.pause()
+            # The remembered model went away; fall back to the next one once
+            if self._is_model_missing(e) and "quota" not in str(e).lower() and _retry and self._switch_model():
+                return self._generate(user_message, _retry=False)
+            return self._error_response(e), False
+
+    def stream_response(self, user_message: str) -> Iterator[str]:
+        """
+        Like get_response(), but yields the reply in chunks as Gemini produces
+        them, so the UI can show the first words right away. The turn is
+        recorded once the stream ends; an abandoned stream records nothing.
+        """
+        if not user_message or not isinstance(user_message, str) or not user_message.strip():
+            yield "I didn't receive your message. Could you please try again? 🤔"
+            return
 
-    def reset_chat(self) -> None:
-        """Reset the chat history while maintaining system instruction."""
+        cached = self._cached_first_turn(user_message)
+        if cached:
+            yield cached
+            return
+
+        first_turn = self.history.is_fresh()
         try:
-            self.chat = self.model.start_chat(history=[])
-            logger.info("Chat history reset successfully")
+            chat_limiter.acquire(self.session_key, use_global=False)
+        except RateLimited as e:
+            response_text = self._error_response(e)
+            self.history.add_turn(user_message, response_text, in_context=False)
+            yield response_text
+            return
+
+        key, result = self._claim(user_message, first_turn)
+        if result is not None:
+            response_text, ok = result
+            yield response_text
+        else:
+            parts: List[str] = []
+            ok = False
+            try:
+                for text, ok in self._stream(user_message):
+                    parts.append(text)
+                    yield text
+                result = ("".join(parts).strip(), ok)
+            finally:
+                # Share the reply (or None if this stream was abandoned)
+                if key is not None:
+                    prompt_coalescer.finish(key, result)
+            response_text = result[0]
+        if ok and first_turn:
+            response_cache.set(user_message, response_text, ANNI_CACHE_NAMESPACE)
+        self.history.add_turn(user_message, response_text, in_context=ok)
+
+    def _stream(self, user_message: str, _retry: bool = True) -> Iterator[Tuple[str, bool]]:
+        """Yields (chunk, ok) pairs; ok is False for fallback and error text."""
+        received = False
+        try:
+            chat_limiter.acquire()
+            logger.info(f"Streaming message to {self.model_name}: {user_message[:50]}...")
+            for text in self.model.stream(self._contents(user_message)):
+                received = True
+                yield text, True
+        except ResponseBlocked as e:
+            logger.warning(str(e))
+            # Mark the turn as failed; only explain if nothing was shown yet
+            yield ("" if received else "I couldn't generate a response due to safety filters. Could you rephrase? 🤔"), False
+            return
         except Exception as e:
-            logger.error(f"Error resetting chat: {str(e)}")
-            raise Exception(f"Failed to reset chat: {str(e)}")
+            logger.error(f"Error streaming response: {str(e)}")
+            if self._is_quota_error(e):
+                chat_limiter.pause()
+            if received:
+                yield "\n\n" + self._error_response(e), False
+            elif self._is_model_missing(e) and "quota" not in str(e).lower() and _retry and self._switch_model():
+                yield from self._stream(user_message, _retry=False)
+            else:
+                yield self._error_response(e), False
+            return
+
+        if received:
+            logger.info("✅ Streamed response complete")
+        else:
+            yield "I'm not sure how to respond to that. Could you ask about food donation, NGO registration, or volunteering with Annapurna? 🌾", False
+
+    def reset_chat(self) -> None:
+        """Clear the conversation, including its summary memory."""
+        self.history.clear()
+        logger.info("Chat history reset successfully")
 
     def get_chat_history(self) -> list:
-        """Get the current chat history."""
-        try:
-            history: List[Dict] = []
-            for msg in self.chat.history:
-                text_parts = []
-                for p in msg.parts:
-                    if hasattr(p, "text"):
-                        text_parts.append(p.text)
-                history.append({
-                    "role": msg.role,
-                    "content": " ".join(text_parts),
-                    "timestamp": datetime.now().isoformat()
-                })
-            return history
-        except Exception as e:
-            logger.error(f"Error retrieving chat history: {str(e)}")
-            return []
+        """Get the full transcript (including turns summarized for the model)."""
+        return [
+            {"role": m["role"], "content": m["content"], "timestamp": m["timestamp"].isoformat()}
+            for m in self.history
+        ]
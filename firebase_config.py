@@ -1,14 +1,33 @@
-# firebase_config.py  (FINAL – local + Render, env folder support)
+# firebase_config.py  (local + Render + emulator; shared by the Streamlit app and the FastAPI backend)
 import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
 import firebase_admin
-from firebase_admin import credentials, firestore
+from dotenv import load_dotenv
+from firebase_admin import credentials
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import firestore as gcloud_firestore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-try:
-    import streamlit as st
-except Exception:
-    st = None
+PROJECT_ROOT = Path(__file__).parent
+load_dotenv(PROJECT_ROOT / ".env")
 
-db = None
+# After a failed initialization, wait this long before trying again
+FIREBASE_INIT_RETRY = float(os.getenv("FIREBASE_INIT_RETRY", "30"))
+
+# Service account file locations, relative to the working directory or the project root
+CREDENTIAL_FILES = (
+    os.path.join("env", "firebase_credentials.json"),
+    "firebase_credentials.json",
+    "serviceAccount.json",
+)
 
 
 def _clean(path):
@@ -18,51 +37,126 @@ def _clean(path):
     return path.strip().strip('"').strip("'")
 
 
-def initialize_firebase():
-    global db
-    try:
-        if not firebase_admin._apps:
-            import json
-            
-            # Try JSON from environment variable first (Render)
-            firebase_creds_json = os.getenv("FIREBASE_CREDENTIALS_JSON")
-            
-            if firebase_creds_json:
-                cred_dict = json.loads(firebase_creds_json)
-                cred = credentials.Certificate(cred_dict)
-                print("✅ Using Firebase credentials from env variable")
+class EmulatorCredential(credentials.Base):
+    """Anonymous credential for the local Firestore emulator."""
+
+    def get_credential(self):
+        return AnonymousCredentials()
+
+
+def find_credential() -> Tuple[credentials.Base, str, Optional[Dict[str, Any]]]:
+    """
+    Pick credentials in order: the Firestore emulator, the
+    FIREBASE_CREDENTIALS_JSON env var (Render), FIREBASE_CREDENTIALS_JSON_PATH,
+    then the usual service account files. Returns (credential, source, app options).
+    """
+    if os.getenv("FIRESTORE_EMULATOR_HOST"):
+        # Local Firestore emulator: no real credentials needed
+        options = {"projectId": os.getenv("GOOGLE_CLOUD_PROJECT", "demo-annapurna")}
+        return EmulatorCredential(), f"emulator at {os.getenv('FIRESTORE_EMULATOR_HOST')}", options
+
+    firebase_creds_json = os.getenv("FIREBASE_CREDENTIALS_JSON")
+    if firebase_creds_json:
+        return credentials.Certificate(json.loads(firebase_creds_json)), "FIREBASE_CREDENTIALS_JSON", None
+
+    candidates = [_clean(os.getenv("FIREBASE_CREDENTIALS_JSON_PATH"))] + list(CREDENTIAL_FILES)
+    for path in filter(None, candidates):
+        for candidate in (Path(path), PROJECT_ROOT / path):
+            if candidate.is_file():
+                return credentials.Certificate(str(candidate)), str(candidate), None
+
+    raise RuntimeError("Firebase credentials not found")
+
+
+class FirebaseState:
+    """
+    Process-wide Firebase app and Firestore clients, created once and
+    reused by every page rerun and request. Tracks readiness for health
+    checks; a failed initialization is retried after FIREBASE_INIT_RETRY.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.app = None
+        self.client: Optional[gcloud_firestore.Client] = None
+        self.async_client: Optional[gcloud_firestore.AsyncClient] = None
+        self.credential_source: Optional[str] = None
+        self.error: Optional[str] = None
+        self.initialized_at: Optional[float] = None
+        self._retry_at = 0.0
+
+    def _ensure_app(self):
+        if self.app is not None:
+            return self.app
+        if time.monotonic() < self._retry_at:
+            raise RuntimeError(self.error or "Firebase initialization failed")
+        try:
+            if firebase_admin._apps:
+                self.app = firebase_admin.get_app()
+                self.credential_source = self.credential_source or "existing app"
             else:
-                # Fallback to file (local dev)
-                possible_paths = [
-                    os.path.join("env", "firebase_credentials.json"),
-                    "firebase_credentials.json",
-                    "serviceAccount.json",
-                ]
-                
-                cred_path = None
-                for p in possible_paths:
-                    if p and os.path.isfile(p):
-                        cred_path = p
-                        break
-                
-                if not cred_path:
-                    raise RuntimeError("Firebase credentials not found")
-                
-                cred = credentials.Certificate(cred_path)
-                print(f"✅ Using Firebase credentials from: {cred_path}")
-
-            firebase_admin.initialize_app(cred)
-            print("✅ Firebase Admin initialized")
-
-        db = firestore.client()
-        return db
-
-    except Exception as e:
-        print("❌ Firebase init error:", e)
-        if st:
-            st.error(f"⚠️ Firebase init error: {e}")
-        return None
+                cred, source, options = find_credential()
+                self.app = firebase_admin.initialize_app(cred, options)
+                self.credential_source = source
+                logger.info(f"Firebase initialized with credentials from {source}")
+            self.error = None
+            self.initialized_at = time.time()
+            return self.app
+        except Exception as e:
+            self.error = str(e)
+            self._retry_at = time.monotonic() + FIREBASE_INIT_RETRY
+            logger.error(f"Firebase init error: {e}")
+            raise
+
+    def _client_args(self) -> Dict[str, Any]:
+        return {"project": self.app.project_id, "credentials": self.app.credential.get_credential()}
+
+    def get_client(self) -> Optional[gcloud_firestore.Client]:
+        """The shared synchronous Firestore client, or None if Firebase is unavailable."""
+        if self.client is None:
+            with self._lock:
+                if self.client is None:
+                    try:
+                        self._ensure_app()
+                        self.client = gcloud_firestore.Client(**self._client_args())
+                    except Exception:
+                        return None
+        return self.client
+
+    def get_async_client(self) -> Optional[gcloud_firestore.AsyncClient]:
+        """The shared AsyncClient (for the FastAPI backend), or None if Firebase is unavailable."""
+        if self.async_client is None:
+            with self._lock:
+                if self.async_client is None:
+                    try:
+                        self._ensure_app()
+                        self.async_client = gcloud_firestore.AsyncClient(**self._client_args())
+                    except Exception:
+                        return None
+        return self.async_client
+
+    @property
+    def ready(self) -> bool:
+        return self.client is not None or self.async_client is not None
+
+    def health(self) -> Dict[str, Any]:
+        """Readiness summary for health endpoints and logs."""
+        return {
+            "ready": self.ready,
+            "project_id": self.app.project_id if self.app is not None else None,
+            "credential_source": self.credential_source,
+            "emulator": bool(os.getenv("FIRESTORE_EMULATOR_HOST")),
+            "initialized_at": self.initialized_at,
+            "error": self.error,
+        }
+
+
+firebase_state = FirebaseState()
+
+
+def initialize_firebase():
+    """The shared Firestore client (created on first call), or None."""
+    return firebase_state.get_client()
 
 
-if db is None:
-    db = initialize_firebase()
+db = initialize_firebase()
@@ -1,9 +1,12 @@
 import streamlit as st
 import os
-from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from firebase_config import db
 from firebase_admin import firestore
+from utils.firestore_cache import firestore_cache
+from utils.admin_data import ADMIN_PAGE_SIZE, AdminDataService
+from utils.paginated_list import paginated_list, reset_paginated_list
+from utils.aggregates import AGGREGATES_COLLECTION, delete_counted
 from pathlib import Path
 import hashlib
 import secrets
@@ -57,87 +60,13 @@ def verify_password(plain_password: str, stored_hash: str) -> bool:
 # ==============================
 # Firebase Data Functions
 # ==============================
-def get_all_users():
-    """Fetch all registered users (donors)"""
-    if not db:
-        return []
-    try:
-        users_ref = db.collection('users').stream()
-        users_list = []
-        for doc in users_ref:
-            user_data = doc.to_dict()
-            user_data['doc_id'] = doc.id  # This is the email
-            users_list.append(user_data)
-        return users_list
-    except Exception as e:
-        st.error(f"Error fetching users: {e}")
-        return []
-
-def get_all_ngos():
-    """Fetch all registered NGOs"""
-    if not db:
-        return []
-    try:
-        ngos_ref = db.collection('ngos').stream()
-        ngos_list = []
-        for doc in ngos_ref:
-            ngo_data = doc.to_dict()
-            ngo_data['doc_id'] = doc.id  # This is the email
-            ngos_list.append(ngo_data)
-        return ngos_list
-    except Exception as e:
-        st.error(f"Error fetching NGOs: {e}")
-        return []
-
-def get_all_volunteers():
-    """Fetch all registered volunteers"""
-    if not db:
-        return []
-    try:
-        volunteers_ref = db.collection('volunteers').stream()
-        volunteers_list = []
-        for doc in volunteers_ref:
-            volunteer_data = doc.to_dict()
-            volunteer_data['doc_id'] = doc.id  # Auto-generated ID
-            volunteers_list.append(volunteer_data)
-        return volunteers_list
-    except Exception as e:
-        st.error(f"Error fetching volunteers: {e}")
-        return []
+admin_data = AdminDataService(db, firestore_cache)
 
-def get_all_donations():
-    """Fetch all donations"""
-    if not db:
-        return []
-    try:
-        donations_ref = db.collection('donations').stream()
-        donations_list = []
-        for doc in donations_ref:
-            donation_data = doc.to_dict()
-            donation_data['id'] = doc.id
-            donations_list.append(donation_data)
-        donations_list.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
-        return donations_list
-    except Exception as e:
-        st.error(f"Error fetching donations: {e}")
-        return []
-
-def get_all_feedbacks():
-    """Fetch all feedbacks"""
-    if not db:
-        return []
-    try:
-        feedbacks_ref = db.collection('feedbacks').stream()
-        feedback_list = []
-        for doc in feedbacks_ref:
-            feedback_data = doc.to_dict()
-            feedback_data['id'] = doc.id
-            feedback_list.append(feedback_data)
-        feedback_list.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
-        return feedback_list
-    except Exception as e:
-        st.error(f"Error fetching feedbacks: {e}")
-        return []
+def delete_counted_doc(collection: str, doc_id: str):
+    """Delete a document and decrement its collection count"""
+    delete_counted(db, collection, doc_id)
+    firestore_cache.invalidate(collection)
+    firestore_cache.invalidate(AGGREGATES_COLLECTION)
 
 def delete_user(user_email: str):
     """Delete a user"""
@@ -145,7 +74,7 @@ def delete_user(user_email: str):
         return False, "Database not initialized."
     try:
         # Users are stored with email as document ID
-        db.collection("users").document(user_email).delete()
+        delete_counted_doc("users", user_email)
         return True, "User deleted successfully!"
     except Exception as e:
         return False, f"Error deleting user: {str(e)}"
@@ -156,7 +85,7 @@ def delete_ngo(ngo_email: str):
         return False, "Database not initialized."
     try:
         # NGOs are stored with email as document ID
-        db.collection("ngos").document(ngo_email).delete()
+        delete_counted_doc("ngos", ngo_email)
         return True, "NGO deleted successfully!"
     except Exception as e:
         return False, f"Error deleting NGO: {str(e)}"
@@ -167,11 +96,22 @@ def delete_volunteer(volunteer_doc_id: str):
         return False, "Database not initialized."
     try:
         # Volunteers use auto-generated document IDs
-        db.collection("volunteers").document(volunteer_doc_id).delete()
+        delete_counted_doc("volunteers", volunteer_doc_id)
         return True, "Volunteer deleted successfully!"
     except Exception as e:
         return False, f"Error deleting volunteer: {str(e)}"
 
+def section_page(collection: str, filters=(), search: str = "", search_fields=()):
+    """Page fetcher for one section, for utils.paginated_list"""
+    def fetch(cursor, page_size):
+        try:
+            return admin_data.page(collection, cursor, page_size, filters=filters,
+                                   search=search, search_fields=search_fields)
+        except Exception as e:
+            st.error(f"Error fetching {collection}: {e}")
+            return [], None
+    return fetch
+
 # ==============================
 # STYLING
 # ==============================
@@ -289,6 +229,16 @@ hr {
 # ==============================
 # SESSION STATE
 # ==============================
+SECTIONS = {
+    "👥 Donors": "users",
+    "🏠 NGOs": "ngos",
+    "🤝 Volunteers": "volunteers",
+    "📦 Donations": "donations",
+    "⭐ Feedbacks": "feedbacks",
+}
+SECTION_LABELS = list(SECTIONS)
+NO_DONATIONS = {"total": 0, "accepted": 0, "pending": 0}
+
 if "admin_logged_in" not in st.session_state:
     st.session_state.admin_logged_in = False
 if "confirm_delete" not in st.session_state:
@@ -343,24 +293,21 @@ with st.sidebar:
     
     st.divider()
     if st.button("🔄 Refresh Data", use_container_width=True):
-        st.cache_resource.clear()
+        # Only the section on screen and the counts are reloaded
+        active_collection = SECTIONS[st.session_state.get("admin_section", SECTION_LABELS[0])]
+        admin_data.refresh(active_collection)
+        reset_paginated_list(f"admin_{active_collection}")
         st.rerun()
 
-# Fetch all data
-users = get_all_users()
-ngos = get_all_ngos()
-volunteers = get_all_volunteers()
-donations = get_all_donations()
-feedbacks = get_all_feedbacks()
-
 # Statistics Overview
+counts = admin_data.counts()
 st.subheader("📈 Platform Statistics")
 col1, col2, col3, col4, col5 = st.columns(5)
 
 with col1:
     st.markdown(f"""
     <div class="stat-card">
-        <div class="stat-number">{len(users)}</div>
+        <div class="stat-number">{counts['users']}</div>
         <div class="stat-label">👥 Donors</div>
     </div>
     """, unsafe_allow_html=True)
@@ -368,7 +315,7 @@ with col1:
 with col2:
     st.markdown(f"""
     <div class="stat-card">
-        <div class="stat-number">{len(ngos)}</div>
+        <div class="stat-number">{counts['ngos']}</div>
         <div class="stat-label">🏠 NGOs</div>
     </div>
     """, unsafe_allow_html=True)
@@ -376,7 +323,7 @@ with col2:
 with col3:
     st.markdown(f"""
     <div class="stat-card">
-        <div class="stat-number">{len(volunteers)}</div>
+        <div class="stat-number">{counts['volunteers']}</div>
         <div class="stat-label">🤝 Volunteers</div>
     </div>
     """, unsafe_allow_html=True)
@@ -384,7 +331,7 @@ with col3:
 with col4:
     st.markdown(f"""
     <div class="stat-card">
-        <div class="stat-number">{len(donations)}</div>
+        <div class="stat-number">{counts['donations']}</div>
         <div class="stat-label">📦 Donations</div>
     </div>
     """, unsafe_allow_html=True)
@@ -392,41 +339,31 @@ with col4:
 with col5:
     st.markdown(f"""
     <div class="stat-card">
-        <div class="stat-number">{len(feedbacks)}</div>
+        <div class="stat-number">{counts['feedbacks']}</div>
         <div class="stat-label">⭐ Feedbacks</div>
     </div>
     """, unsafe_allow_html=True)
 
 st.markdown("---")
 
-# Tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "👥 Donors", 
-    "🏠 NGOs", 
-    "🤝 Volunteers", 
-    "📦 Donations", 
-    "⭐ Feedbacks"
-])
+# Sections: unlike st.tabs, only the selected one runs and loads data
+section = st.radio("Section", SECTION_LABELS, key="admin_section", horizontal=True, label_visibility="collapsed")
 
 # ==============================
-# TAB 1: DONORS
+# SECTION 1: DONORS
 # ==============================
-with tab1:
-    st.subheader(f"👥 Registered Donors ({len(users)})")
+if SECTIONS[section] == "users":
+    st.subheader(f"👥 Registered Donors ({counts['users']})")
     
-    if users:
+    if counts['users']:
         # Add search functionality
         search_donor = st.text_input("🔍 Search donors by name or email", key="search_donor")
         
-        filtered_users = users
-        if search_donor:
-            filtered_users = [u for u in users if 
-                            search_donor.lower() in u.get('name', '').lower() or 
-                            search_donor.lower() in u.get('email', '').lower()]
+        donor_counts = admin_data.donation_counts('donor_email')
         
-        for user in filtered_users:
+        def render_donor(user):
             # Count donations by this donor
-            donor_donations = [d for d in donations if d.get('donor_email') == user.get('email')]
+            donor_donations = donor_counts.get(user.get('email'), NO_DONATIONS)
             
             with st.container():
                 col1, col2 = st.columns([4, 1])
@@ -437,9 +374,9 @@ with tab1:
                         <h4>👤 {user.get('name', 'N/A')}</h4>
                         <p><strong>📧 Email:</strong> {user.get('email', 'N/A')}</p>
                         <p><strong>📅 Registered:</strong> {user.get('created_at', 'N/A')}</p>
-                        <p><strong>🎁 Total Donations:</strong> {len(donor_donations)}</p>
-                        <p><strong>✅ Accepted:</strong> {len([d for d in donor_donations if d.get('status') == 'Accepted'])}</p>
-                        <p><strong>⏳ Pending:</strong> {len([d for d in donor_donations if d.get('status') == 'Pending'])}</p>
+                        <p><strong>🎁 Total Donations:</strong> {donor_donations['total']}</p>
+                        <p><strong>✅ Accepted:</strong> {donor_donations['accepted']}</p>
+                        <p><strong>⏳ Pending:</strong> {donor_donations['pending']}</p>
                     </div>
                     """, unsafe_allow_html=True)
                 
@@ -469,27 +406,29 @@ with tab1:
                             st.session_state.confirm_delete = None
                             st.session_state.delete_type = None
                             st.rerun()
+        
+        paginated_list(
+            "admin_users", section_page("users", search=search_donor, search_fields=("name", "email")),
+            render_donor, signature=search_donor, default_page_size=ADMIN_PAGE_SIZE,
+            compact_columns=("name", "email", "created_at"), empty_message="No donors found.",
+        )
     else:
         st.info("No donors registered yet.")
 
 # ==============================
-# TAB 2: NGOs
+# SECTION 2: NGOs
 # ==============================
-with tab2:
-    st.subheader(f"🏠 Registered NGOs ({len(ngos)})")
+elif SECTIONS[section] == "ngos":
+    st.subheader(f"🏠 Registered NGOs ({counts['ngos']})")
     
-    if ngos:
+    if counts['ngos']:
         search_ngo = st.text_input("🔍 Search NGOs by name or email", key="search_ngo")
         
-        filtered_ngos = ngos
-        if search_ngo:
-            filtered_ngos = [n for n in ngos if 
-                           search_ngo.lower() in n.get('org_name', '').lower() or 
-                           search_ngo.lower() in n.get('email', '').lower()]
+        ngo_counts = admin_data.donation_counts('accepted_by_email')
         
-        for ngo in filtered_ngos:
+        def render_ngo(ngo):
             # Count donations accepted by this NGO
-            ngo_donations = [d for d in donations if d.get('accepted_by_email') == ngo.get('email')]
+            ngo_donations = ngo_counts.get(ngo.get('email'), NO_DONATIONS)
             
             with st.container():
                 col1, col2 = st.columns([4, 1])
@@ -503,7 +442,7 @@ with tab2:
                         <p><strong>📞 Phone:</strong> {ngo.get('phone', 'N/A')}</p>
                         <p><strong>📍 Address:</strong> {ngo.get('address', 'N/A')}</p>
                         <p><strong>📅 Registered:</strong> {ngo.get('created_at', 'N/A')}</p>
-                        <p><strong>🎁 Donations Accepted:</strong> {len(ngo_donations)}</p>
+                        <p><strong>🎁 Donations Accepted:</strong> {ngo_donations['total']}</p>
                     </div>
                     """, unsafe_allow_html=True)
                 
@@ -533,25 +472,26 @@ with tab2:
                             st.session_state.confirm_delete = None
                             st.session_state.delete_type = None
                             st.rerun()
+        
+        paginated_list(
+            "admin_ngos", section_page("ngos", search=search_ngo, search_fields=("org_name", "email")),
+            render_ngo, signature=search_ngo, default_page_size=ADMIN_PAGE_SIZE,
+            compact_columns=("org_name", "email", "contact_person", "phone", "address", "created_at"),
+            empty_message="No NGOs found.",
+        )
     else:
         st.info("No NGOs registered yet.")
 
 # ==============================
-# TAB 3: VOLUNTEERS
+# SECTION 3: VOLUNTEERS
 # ==============================
-with tab3:
-    st.subheader(f"🤝 Registered Volunteers ({len(volunteers)})")
+elif SECTIONS[section] == "volunteers":
+    st.subheader(f"🤝 Registered Volunteers ({counts['volunteers']})")
     
-    if volunteers:
+    if counts['volunteers']:
         search_vol = st.text_input("🔍 Search volunteers by name or email", key="search_vol")
         
-        filtered_volunteers = volunteers
-        if search_vol:
-            filtered_volunteers = [v for v in volunteers if 
-                                 search_vol.lower() in v.get('name', '').lower() or 
-                                 search_vol.lower() in v.get('email', '').lower()]
-        
-        for volunteer in filtered_volunteers:
+        def render_volunteer(volunteer):
             with st.container():
                 col1, col2 = st.columns([4, 1])
                 
@@ -596,14 +536,21 @@ with tab3:
                             st.session_state.confirm_delete = None
                             st.session_state.delete_type = None
                             st.rerun()
+        
+        paginated_list(
+            "admin_volunteers", section_page("volunteers", search=search_vol, search_fields=("name", "email")),
+            render_volunteer, signature=search_vol, default_page_size=ADMIN_PAGE_SIZE,
+            compact_columns=("name", "email", "phone", "location", "availability", "interests", "registration_date"),
+            empty_message="No volunteers found.",
+        )
     else:
         st.info("No volunteers registered yet.")
 
 # ==============================
-# TAB 4: DONATIONS
+# SECTION 4: DONATIONS
 # ==============================
-with tab4:
-    st.subheader(f"📦 All Donations ({len(donations)})")
+elif SECTIONS[section] == "donations":
+    st.subheader(f"📦 All Donations ({counts['donations']})")
     
     # Filters
     col1, col2, col3 = st.columns(3)
@@ -614,86 +561,103 @@ with tab4:
     with col3:
         search_donation = st.text_input("🔍 Search by donor or food name")
     
-    # Apply filters
-    filtered_donations = donations
+    # Apply filters: equality filters run in Firestore, text search on the cached view
+    donation_filters = []
     if status_filter != "All":
-        filtered_donations = [d for d in filtered_donations if d.get('status') == status_filter]
+        donation_filters.append(('status', status_filter))
     if food_type_filter != "All":
-        filtered_donations = [d for d in filtered_donations if d.get('food_type') == food_type_filter]
+        donation_filters.append(('food_type', food_type_filter))
+    donation_search_fields = ('donor_name', 'food_name')
+    
     if search_donation:
-        filtered_donations = [d for d in filtered_donations if 
-                            search_donation.lower() in d.get('donor_name', '').lower() or 
-                            search_donation.lower() in d.get('food_name', '').lower()]
+        total = len(admin_data.search("donations", search_donation, donation_search_fields, donation_filters))
+    else:
+        total = admin_data.count("donations", donation_filters)
     
-    st.info(f"📊 Showing {len(filtered_donations)} donations")
+    st.info(f"📊 {total} donations match")
     
-    if filtered_donations:
-        for donation in filtered_donations:
-            status_color = {
-                "Pending": "🟡",
-                "Accepted": "🟢",
-                "Rejected": "🔴"
-            }.get(donation.get('status'), "⚪")
-            
-            created_at = "N/A"
-            if 'created_at' in donation and donation['created_at']:
-                ts = donation['created_at']
-                if hasattr(ts, "strftime"):
-                    created_at = ts.strftime("%Y-%m-%d %I:%M %p")
-                elif hasattr(ts, "to_datetime"):
-                    created_at = ts.to_datetime().strftime("%Y-%m-%d %I:%M %p")
-            
-            st.markdown(f"""
-            <div class="user-card">
-                <h4>{status_color} {donation.get('food_name', 'N/A')}</h4>
-                <p><strong>👤 Donor:</strong> {donation.get('donor_name', 'N/A')} ({donation.get('donor_email', 'N/A')})</p>
-                <p><strong>📦 Quantity:</strong> {donation.get('quantity', 'N/A')} servings</p>
-                <p><strong>🥗 Type:</strong> {donation.get('food_type', 'N/A')}</p>
-                <p><strong>📅 Expires:</strong> {donation.get('expiry_date', 'N/A')}</p>
-                <p><strong>📍 Address:</strong> {donation.get('address', 'N/A')}</p>
-                <p><strong>📞 Contact:</strong> {donation.get('contact_number', 'N/A')}</p>
-                <p><strong>📝 Description:</strong> {donation.get('description', 'None')}</p>
-                <p><strong>📅 Created:</strong> {created_at}</p>
-                <p><strong>🎯 Status:</strong> {donation.get('status', 'N/A')}</p>
-                {f"<p><strong>🏢 Accepted By:</strong> {donation.get('accepted_by_ngo', 'N/A')}</p>" if donation.get('status') == 'Accepted' else ""}
-            </div>
-            """, unsafe_allow_html=True)
-    else:
-        st.info("No donations found matching the filters.")
+    def render_donation(donation):
+        status_color = {
+            "Pending": "🟡",
+            "Accepted": "🟢",
+            "Rejected": "🔴"
+        }.get(donation.get('status'), "⚪")
+
+        created_at = "N/A"
+        if 'created_at' in donation and donation['created_at']:
+            ts = donation['created_at']
+            if hasattr(ts, "strftime"):
+                created_at = ts.strftime("%Y-%m-%d %I:%M %p")
+            elif hasattr(ts, "to_datetime"):
+                created_at = ts.to_datetime().strftime("%Y-%m-%d %I:%M %p")
+
+        st.markdown(f"""
+        <div class="user-card">
+            <h4>{status_color} {donation.get('food_name', 'N/A')}</h4>
+            <p><strong>👤 Donor:</strong> {donation.get('donor_name', 'N/A')} ({donation.get('donor_email', 'N/A')})</p>
+            <p><strong>📦 Quantity:</strong> {donation.get('quantity', 'N/A')} servings</p>
+            <p><strong>🥗 Type:</strong> {donation.get('food_type', 'N/A')}</p>
+            <p><strong>📅 Expires:</strong> {donation.get('expiry_date', 'N/A')}</p>
+            <p><strong>📍 Address:</strong> {donation.get('address', 'N/A')}</p>
+            <p><strong>📞 Contact:</strong> {donation.get('contact_number', 'N/A')}</p>
+            <p><strong>📝 Description:</strong> {donation.get('description', 'None')}</p>
+            <p><strong>📅 Created:</strong> {created_at}</p>
+            <p><strong>🎯 Status:</strong> {donation.get('status', 'N/A')}</p>
+            {f"<p><strong>🏢 Accepted By:</strong> {donation.get('accepted_by_ngo', 'N/A')}</p>" if donation.get('status') == 'Accepted' else ""}
+        </div>
+        """, unsafe_allow_html=True)
+    
+    paginated_list(
+        "admin_donations",
+        section_page("donations", filters=donation_filters, search=search_donation, search_fields=donation_search_fields),
+        render_donation, signature=(tuple(donation_filters), search_donation), default_page_size=ADMIN_PAGE_SIZE,
+        compact_columns=("food_name", "donor_name", "donor_email", "quantity", "food_type", "status", "created_at"),
+        empty_message="No donations found matching the filters.",
+    )
 
 # ==============================
-# TAB 5: FEEDBACKS
+# SECTION 5: FEEDBACKS
 # ==============================
-with tab5:
-    st.subheader(f"⭐ All Feedbacks ({len(feedbacks)})")
+else:
+    st.subheader(f"⭐ All Feedbacks ({counts['feedbacks']})")
     
     # Filter
     feedback_filter = st.selectbox("Filter by Type", ["All", "Donor", "NGO"])
     
-    filtered_feedbacks = feedbacks
-    if feedback_filter != "All":
-        filtered_feedbacks = [f for f in feedbacks if f.get('type') == feedback_filter]
+    feedback_filters = [('type', feedback_filter)] if feedback_filter != "All" else []
     
-    st.info(f"📊 Showing {len(filtered_feedbacks)} feedbacks")
+    # Rating summary from the maintained aggregate, not a scan
+    summary = admin_data.ratings(None if feedback_filter == "All" else feedback_filter)
+    if summary["count"]:
+        col_avg, col_chart = st.columns([1, 3])
+        with col_avg:
+            st.metric("Average Rating", f"{summary['average']:.1f} ⭐")
+        with col_chart:
+            st.bar_chart({"Feedbacks": {f"{r} ⭐": n for r, n in summary["histogram"].items()}}, height=160)
+    st.info(f"📊 {admin_data.count('feedbacks', feedback_filters)} feedbacks match")
     
-    if filtered_feedbacks:
-        for feedback in filtered_feedbacks:
-            created_at = "Recently"
-            if 'created_at' in feedback and feedback['created_at']:
-                ts = feedback['created_at']
-                if hasattr(ts, "strftime"):
-                    created_at = ts.strftime("%Y-%m-%d %I:%M %p")
-                elif hasattr(ts, "to_datetime"):
-                    created_at = ts.to_datetime().strftime("%Y-%m-%d %I:%M %p")
-            
-            st.markdown(f"""
-            <div class="user-card">
-                <h4>⭐ {"⭐" * feedback.get('rating', 0)} ({feedback.get('rating', 0)}/5)</h4>
-                <p><strong>📌 For:</strong> {feedback.get('type', 'N/A')}</p>
-                <p><strong>💬 Message:</strong> {feedback.get('message', 'N/A')}</p>
-                <p><strong>👤 Author:</strong> {feedback.get('author', 'Anonymous')}</p>
-                <p><strong>📅 Submitted:</strong> {created_at}</p>
-            </div>
-            """, unsafe_allow_html=True)
-    else:
-        st.info("No feedbacks found matching the filter.")
+    def render_feedback(feedback):
+        created_at = "Recently"
+        if 'created_at' in feedback and feedback['created_at']:
+            ts = feedback['created_at']
+            if hasattr(ts, "strftime"):
+                created_at = ts.strftime("%Y-%m-%d %I:%M %p")
+            elif hasattr(ts, "to_datetime"):
+                created_at = ts.to_datetime().strftime("%Y-%m-%d %I:%M %p")
+
+        st.markdown(f"""
+        <div class="user-card">
+            <h4>⭐ {"⭐" * feedback.get('rating', 0)} ({feedback.get('rating', 0)}/5)</h4>
+            <p><strong>📌 For:</strong> {feedback.get('type', 'N/A')}</p>
+            <p><strong>💬 Message:</strong> {feedback.get('message', 'N/A')}</p>
+            <p><strong>👤 Author:</strong> {feedback.get('author', 'Anonymous')}</p>
+            <p><strong>📅 Submitted:</strong> {created_at}</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    paginated_list(
+        "admin_feedbacks", section_page("feedbacks", filters=feedback_filters),
+        render_feedback, signature=tuple(feedback_filters), default_page_size=ADMIN_PAGE_SIZE,
+        compact_columns=("rating", "type", "message", "author", "created_at"),
+        empty_message="No feedbacks found matching the filter.",
+    )
@@ -1,17 +1,23 @@
 import streamlit as st
 import json
-import os
 from datetime import datetime
-import folium
-from streamlit_folium import st_folium
-from geopy.distance import geodesic
 from dotenv import load_dotenv
 from firebase_config import db
 from firebase_admin import firestore
 import hashlib
 import secrets
 import time
-import googlemaps
+from utils.maps_utils import (
+    geocode_many_to_coords,
+    geocode_to_coords,
+    get_maps_client,
+    get_ngo_coords,
+    ngo_location_fields,
+)
+from utils.spatial_index import CollectionIndex, ngo_index
+from utils.firestore_cache import firestore_cache
+from utils.aggregates import AGGREGATES_COLLECTION, create_counted
+from utils.lazy_imports import folium, st_folium
 
 # Apply custom styles (keeping your original styles)
 st.markdown("""
@@ -155,18 +161,8 @@ st.markdown("""
 # Load environment variables
 load_dotenv()
 
-# Initialize Google Maps client
-GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
-gmaps = None
-if GOOGLE_MAPS_API_KEY:
-    try:
-        gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
-        print("✅ Google Maps API initialized successfully")
-    except Exception as e:
-        print(f"⚠️ Google Maps API initialization failed: {e}")
-        gmaps = None
-else:
-    print("⚠️ GOOGLE_MAPS_API_KEY not found in environment variables")
+# Google Maps client (shared across sessions)
+gmaps = get_maps_client()
 
 # --- Password Hashing ---
 def hash_password(password: str) -> str:
@@ -212,7 +208,9 @@ def create_user(name: str, email: str, password: str):
             "hashed_password": hashed_password,
             "created_at": firestore.SERVER_TIMESTAMP
         }
-        user_ref.set(user_data)
+        # Creates the user and bumps the donor count together
+        create_counted(db, "users", user_data, doc_id=user_ref.id)
+        firestore_cache.invalidate(AGGREGATES_COLLECTION)
         return True, "User created successfully."
     except ValueError as ve:
         return False, str(ve)
@@ -271,15 +269,15 @@ if "user" not in st.session_state:
     st.session_state.user = None
 if "donor_logged_in" not in st.session_state:
     st.session_state.donor_logged_in = False
-if "geocode_cache" not in st.session_state:
-    st.session_state.geocode_cache = {}
 
 # --- FIREBASE DONATION FUNCTIONS ---
 def save_donation_to_firebase(donation_data: dict):
     if not db:
         return False
     try:
-        db.collection("donations").add(donation_data)
+        create_counted(db, "donations", donation_data)
+        firestore_cache.invalidate("donations")
+        firestore_cache.invalidate(AGGREGATES_COLLECTION)
         return True
     except Exception as e:
         print(f"Error saving donation: {str(e)}")
@@ -289,94 +287,64 @@ def get_donations_by_email(email: str):
     if not db:
         return []
     try:
-        query = db.collection("donations").where("donor_email", "==", email)
-        donations = [doc.to_dict() for doc in query.stream()]
-        donations.sort(key=lambda x: x.get('created_at') or datetime.min, reverse=True)
-        return donations
+        def load():
+            donations = [
+                d for d in firestore_cache.collection("donations")
+                if d.get("donor_email") == email
+            ]
+            donations.sort(key=lambda x: x.get('created_at') or datetime.min, reverse=True)
+            return donations
+        return firestore_cache.query("donations", ("donor_email", email), load)
     except Exception as e:
         st.error(f"Error fetching donations: {e}")
         return []
 
 # --- IMPROVED NGO LOCATION FUNCTIONS ---
-def get_ngos_from_firebase():
-    """Fetch all NGOs from Firebase"""
-    if not db:
-        st.error("Database not initialized")
-        return []
-    try:
-        ngos = []
-        docs = db.collection("ngos").stream()
-        for doc in docs:
-            ngo_data = doc.to_dict()
-            ngo_data['id'] = doc.id
-            ngos.append(ngo_data)
-        print(f"✅ Fetched {len(ngos)} NGOs from Firebase")
-        for ngo in ngos:
-            print(f"  - {ngo.get('org_name', 'Unknown')}: {ngo.get('address', 'No address')}")
-        return ngos
-    except Exception as e:
-        st.error(f"Error fetching NGOs: {e}")
-        return []
+@st.cache_resource(show_spinner=False)
+def get_ngo_locations():
+    """
+    Process-wide NGO spatial index. It follows the `ngos` collection view,
+    so NGO changes update it as they happen and a search never walks the
+    whole collection.
+    """
+    locations = CollectionIndex(get_ngo_coords, ngo_index)
+    firestore_cache.subscribe("ngos", locations.apply)
+    return locations
 
-def geocode_address_with_retry(address: str, max_retries=3):
+def geocode_address_with_retry(address: str):
     """
-    Geocode address using Google Maps API (primary) or fallback
-    Optimized for Indian addresses
+    Geocode address using Google Maps API via the shared geocoding pipeline.
+    A donor's search address is a one-off, so it is not kept in the
+    on-disk geocode store.
     """
-    # Check cache first
-    if address in st.session_state.geocode_cache:
-        print(f"🔍 Using cached coordinates for: {address}")
-        return st.session_state.geocode_cache[address]
-    
-    # Clean address
-    clean_address = address.strip()
-    
-    # Try Google Maps API first (if available)
-    if gmaps:
-        print(f"🔍 Geocoding with Google Maps API: {clean_address}")
-        try:
-            result = gmaps.geocode(clean_address, region='in')
-            
-            if result and len(result) > 0:
-                location = result[0]['geometry']['location']
-                coords = (location['lat'], location['lng'])
-                print(f"✅ Google Maps found coordinates: {coords}")
-                
-                # Cache the result
-                st.session_state.geocode_cache[address] = coords
-                return coords
-            else:
-                print(f"⚠️ Google Maps: No results for {clean_address}")
-        except Exception as e:
-            print(f"❌ Google Maps API error: {e}")
-    
-    # Fallback: Try adding India if not present
-    if not any(term in clean_address.lower() for term in ['india', 'bharat']):
-        clean_address_with_country = f"{clean_address}, India"
-        if gmaps:
-            try:
-                result = gmaps.geocode(clean_address_with_country, region='in')
-                if result and len(result) > 0:
-                    location = result[0]['geometry']['location']
-                    coords = (location['lat'], location['lng'])
-                    print(f"✅ Google Maps found (with India): {coords}")
-                    st.session_state.geocode_cache[address] = coords
-                    return coords
-            except Exception as e:
-                print(f"❌ Google Maps API error (retry): {e}")
-    
-    print(f"❌ Failed to geocode: {address}")
-    return None
+    coords = geocode_to_coords(address, gmaps, persist=False)
+    if coords:
+        print(f"✅ Coordinates for {address}: {coords}")
+    else:
+        print(f"❌ Failed to geocode: {address}")
+    return coords
+
+def resolve_ngo_coords(ngo: dict):
+    """
+    Return stored NGO coordinates, geocoding and saving them on the
+    NGO document only when they are missing or the address changed.
+    """
+    coords = get_ngo_coords(ngo)
+    if coords:
+        return coords
 
-def calculate_distance(coord1, coord2):
-    """Calculate distance between two coordinates in kilometers"""
-    try:
-        distance = round(geodesic(coord1, coord2).kilometers, 2)
-        return distance
-    except Exception as e:
-        print(f"Error calculating distance: {e}")
+    fields = ngo_location_fields(ngo.get('address', ''), gmaps)
+    if not fields:
         return None
 
+    if db and ngo.get('id'):
+        try:
+            db.collection("ngos").document(ngo['id']).update(fields)
+        except Exception as e:
+            print(f"⚠️ Could not save coordinates for {ngo.get('org_name', 'Unknown')}: {e}")
+    ngo.update(fields)
+    return (fields['lat'], fields['lng'])
+
 def find_nearby_ngos(donor_address: str, max_distance: float = 10.0):
     """
     Find NGOs near the donor's address with improved error handling
@@ -392,50 +360,40 @@ def find_nearby_ngos(donor_address: str, max_distance: float = 10.0):
     
     print(f"✅ Donor location: {donor_coords}")
     
-    # Get all NGOs
-    ngos = get_ngos_from_firebase()
-    if not ngos:
-        print("⚠️ No NGOs found in database")
+    if not db:
+        st.error("Database not initialized")
         return donor_coords, []
-    
+    locations = get_ngo_locations()
+    try:
+        # Loads the NGO view on first use; afterwards its listener keeps it current
+        firestore_cache.refresh("ngos")
+    except Exception as e:
+        st.error(f"Error fetching NGOs: {e}")
+        return donor_coords, []
+
+    # Only new NGOs or changed addresses lack coordinates; geocode those in
+    # parallel, save them on their documents and index them right away
+    unlocated = [ngo for ngo in locations.unlocated() if ngo.get('address', '').strip()]
+    if unlocated:
+        print(f"🌐 Geocoding {len(unlocated)} NGO address(es) in parallel")
+        geocode_many_to_coords([ngo['address'] for ngo in unlocated], gmaps)
+        resolved = {}
+        for ngo in unlocated:
+            if resolve_ngo_coords(ngo):
+                resolved[ngo['id']] = ngo
+            else:
+                print(f"❌ Could not geocode NGO address: {ngo.get('org_name', 'Unknown')}")
+        locations.apply(resolved)
+
+    # Radius query only touches grid cells around the donor; distances are
+    # ranked in one vectorized haversine pass and the closest are refined
+    # with geodesic distances
     nearby_ngos = []
-    
-    # Process each NGO
-    for ngo in ngos:
-        ngo_address = ngo.get('address', '').strip()
-        if not ngo_address:
-            print(f"⚠️ NGO {ngo.get('org_name', 'Unknown')} has no address")
-            continue
-        
-        print(f"\n📍 Processing NGO: {ngo.get('org_name', 'Unknown')}")
-        print(f"   Address: {ngo_address}")
-        
-        # Geocode NGO address
-        ngo_coords = geocode_address_with_retry(ngo_address)
-        if not ngo_coords:
-            print(f"   ❌ Could not geocode NGO address")
-            continue
-        
-        print(f"   ✅ NGO coordinates: {ngo_coords}")
-        
-        # Calculate distance
-        distance = calculate_distance(donor_coords, ngo_coords)
-        if distance is None:
-            print(f"   ❌ Could not calculate distance")
-            continue
-        
-        print(f"   📏 Distance: {distance} km")
-        
-        if distance <= max_distance:
-            ngo['distance'] = distance
-            ngo['coordinates'] = ngo_coords
-            nearby_ngos.append(ngo)
-            print(f"   ✅ Added to nearby list")
-        else:
-            print(f"   ⚠️ Too far ({distance} km > {max_distance} km)")
-    
-    # Sort by distance
-    nearby_ngos.sort(key=lambda x: x.get('distance', float('inf')))
+    for _, distance, ngo in ngo_index.query_radius(donor_coords, max_distance, accuracy="geodesic"):
+        ngo = dict(ngo)
+        ngo['distance'] = round(distance, 2)
+        ngo['coordinates'] = (ngo['lat'], ngo['lng'])
+        nearby_ngos.append(ngo)
     
     print(f"\n📊 Final results: {len(nearby_ngos)} NGOs within {max_distance} km")
     for ngo in nearby_ngos:
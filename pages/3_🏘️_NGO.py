@@ -1,13 +1,16 @@
 import streamlit as st
 import json
-import os
-from datetime import datetime
 from dotenv import load_dotenv
 from firebase_config import db
 from firebase_admin import firestore
 from pathlib import Path
 import hashlib
 import secrets
+from utils.maps_utils import ngo_location_fields
+from utils.firestore_cache import firestore_cache
+from utils.paginated_list import paginated_list, reset_paginated_list
+from utils.aggregates import AGGREGATES_COLLECTION, create_counted
+from utils import donations as donations_service
 
 # ----------------------------
 # Streamlit Page Config (MUST be first Streamlit call)
@@ -18,24 +21,8 @@ st.set_page_config(page_title="NGO Portal", page_icon="🤝", layout="wide")
 # Load environment variables
 # ----------------------------
 env_path = Path(__file__).parent.parent / '.env'
-print(f"🔍 Looking for .env file at: {env_path}")
-
 load_dotenv(env_path, override=True)
 
-print("📋 Environment variables:")
-for var in ["FIREBASE_CREDENTIALS_JSON_PATH", "FIREBASE_DATABASE_URL"]:
-    print(f"   {var}: {'✅ Set' if os.getenv(var) else '❌ Not set'}")
-
-if not os.getenv("FIREBASE_CREDENTIALS_JSON_PATH"):
-    print("❌ FIREBASE_CREDENTIALS_JSON_PATH is not set in .env file")
-if not os.getenv("FIREBASE_DATABASE_URL"):
-    print("❌ FIREBASE_DATABASE_URL is not set in .env file")
-
-creds_path = os.getenv('FIREBASE_CREDENTIALS_JSON_PATH', '')
-print(f"📂 Raw path from env: {creds_path}")
-print(f"📂 Absolute path: {os.path.abspath(creds_path) if creds_path else 'N/A'}")
-print(f"📂 File exists: {os.path.exists(creds_path) if creds_path else 'N/A'}")
-
 # ----------------------------
 # Password Hashing Functions (Same as Donor Portal)
 # ----------------------------
@@ -106,7 +93,12 @@ def create_ngo(org_name: str, email: str, password: str, address: str, contact_p
             "created_at": firestore.SERVER_TIMESTAMP,
             "auth_method": "email"
         }
-        ngo_ref.set(ngo_data)
+        # Geocode once at registration so nearby searches need no API calls
+        if ngo_data["address"]:
+            ngo_data.update(ngo_location_fields(ngo_data["address"]))
+        create_counted(db, "ngos", ngo_data, doc_id=ngo_ref.id)
+        firestore_cache.invalidate("ngos")
+        firestore_cache.invalidate(AGGREGATES_COLLECTION)
         return True, "NGO registered successfully."
     except ValueError as ve:
         return False, str(ve)
@@ -193,42 +185,53 @@ def save_ngo_data(ngo_info: dict):
     st.session_state.ngo_logged_in = True
 
 
-def get_available_donations():
-    """Fetch all available donations from Cloud Firestore."""
+PENDING_FILTER = [("status", "Pending")]
+
+
+def get_available_donations(cursor=None, page_size: int = 20):
+    """One page of Pending donations, newest first, read straight from Firestore."""
     if not db:
         st.error("Database connection not available.")
-        return []
+        return [], None
     try:
-        donations_ref = db.collection('donations').where('status', '==', 'Pending').stream()
-        
-        donation_list = []
-        for doc in donations_ref:
-            donation_data = doc.to_dict()
-            donation_data['id'] = doc.id
-            donation_list.append(donation_data)
-            
-        return donation_list
+        return firestore_cache.page("donations", "created_at", page_size, cursor, filters=PENDING_FILTER)
     except Exception as e:
         st.error(f"Error fetching donations: {e}")
-        return []
+        return [], None
+
+
+def count_available_donations() -> int:
+    """Number of Pending donations, from a count() aggregation."""
+    try:
+        return firestore_cache.count("donations", PENDING_FILTER)
+    except Exception as e:
+        st.error(f"Error counting donations: {e}")
+        return 0
 
 
 def accept_donation(donation_id: str, ngo_data: dict):
-    """Update donation status to Accepted in Firestore."""
+    """Accept a Pending donation (shared, contention-safe path)."""
     if not db:
         return False
     try:
-        doc_ref = db.collection('donations').document(donation_id)
-        doc_ref.update({
-            'status': 'Accepted',
-            'accepted_by_ngo': ngo_data.get('org_name', 'Unknown NGO'),
-            'accepted_by_email': ngo_data.get('email'),
-            'accepted_at': firestore.SERVER_TIMESTAMP,
-        })
+        donations_service.accept_donation(
+            db,
+            donation_id,
+            ngo_data.get('org_name', 'Unknown NGO'),
+            ngo_data.get('email'),
+        )
         return True
+    except donations_service.DonationNotFound:
+        st.error("This donation no longer exists.")
+        return False
+    except donations_service.DonationUnavailable:
+        st.warning("⚠️ Another NGO has already accepted this donation.")
+        return False
     except Exception as e:
         st.error(f"Error accepting donation: {e}")
         return False
+    finally:
+        firestore_cache.invalidate("donations")
 
 # ----------------------------
 # Styling
@@ -544,6 +547,8 @@ else:
             st.rerun()
         
         if st.button("🔄 Refresh Donations"):
+            firestore_cache.invalidate("donations")
+            reset_paginated_list("ngo_donations")
             st.rerun()
 
     st.markdown("""
@@ -554,19 +559,14 @@ else:
     """, unsafe_allow_html=True)
 
     with st.spinner("Loading available donations..."):
-        available_donations = get_available_donations()
+        available_count = count_available_donations()
 
-    st.info(f"📊 **{len(available_donations)}** pending donations are available for pickup.")
+    st.info(f"📊 **{available_count}** pending donations are available for pickup.")
 
-    if not available_donations:
+    if not available_count:
         st.warning("ℹ️ No active donations available right now. Check back later!")
     else:
-        available_donations.sort(
-            key=lambda d: d.get('created_at', datetime.min),
-            reverse=True
-        )
-
-        for donation in available_donations:
+        def render_donation(donation):
             with st.container():
                 st.markdown(f"""
                 <div class="donation-card">
@@ -596,3 +596,9 @@ else:
                             st.success(f"🎉 Donation from {donation.get('donor_name', 'donor')} accepted!")
                             st.info("The donor will be notified. Please arrange for pickup.")
                             st.rerun()
+
+        paginated_list(
+            "ngo_donations", get_available_donations, render_donation,
+            compact_columns=("food_name", "quantity", "food_type", "expiry_date", "donor_name", "address"),
+            empty_message="ℹ️ No active donations available right now. Check back later!",
+        )
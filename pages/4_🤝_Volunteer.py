@@ -2,6 +2,8 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 from firebase_config import db
+from utils.firestore_cache import firestore_cache
+from utils.aggregates import AGGREGATES_COLLECTION, create_counted
 from firebase_admin import firestore
 from pathlib import Path
 
@@ -20,7 +22,9 @@ def save_volunteer_registration(volunteer_data: dict):
         return False, "Database connection not available."
     try:
         # Add to 'volunteers' collection
-        db.collection("volunteers").add(volunteer_data)
+        create_counted(db, "volunteers", volunteer_data)
+        firestore_cache.invalidate("volunteers")
+        firestore_cache.invalidate(AGGREGATES_COLLECTION)
         return True, "Registration successful!"
     except Exception as e:
         return False, f"Error saving registration: {str(e)}"
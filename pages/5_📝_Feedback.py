@@ -1,11 +1,21 @@
 import streamlit as st
-from datetime import datetime
 import os
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import credentials, firestore
 from pathlib import Path
 from firebase_config import db
+from utils.firestore_cache import firestore_cache
+from utils.paginated_list import paginated_list, reset_paginated_list
+from utils.aggregates import (
+    AGGREGATES_COLLECTION,
+    FEEDBACK_RATINGS_DOC_ID,
+    create_feedback,
+    delete_feedback,
+    rating_summary,
+    ratings_from,
+    recount_ratings,
+)
 from firebase_admin import firestore
 
 # ----------------------------
@@ -21,36 +31,54 @@ def save_feedback_to_firebase(feedback_data: dict):
     if not db:
         return False, "Database not initialized."
     try:
-        db.collection("feedbacks").add(feedback_data)
+        # Also adds the rating to the per-type aggregate, in the same batch
+        create_feedback(db, feedback_data)
+        firestore_cache.invalidate("feedbacks")
+        firestore_cache.invalidate(AGGREGATES_COLLECTION)
         return True, "Feedback submitted successfully!"
     except Exception as e:
         return False, f"Error saving feedback: {str(e)}"
 
-def get_all_feedbacks():
-    """Fetch all feedbacks from Firebase"""
+def get_rating_summary(filter_type: str):
+    """Count, average and histogram from the maintained ratings aggregate (one document read)"""
     if not db:
-        return []
+        return rating_summary(None)
     try:
-        feedbacks_ref = db.collection('feedbacks').stream()
-        feedback_list = []
-        for doc in feedbacks_ref:
-            feedback_data = doc.to_dict()
-            feedback_data['id'] = doc.id  # Store document ID for editing/deleting
-            feedback_list.append(feedback_data)
-        
-        # Sort by created_at timestamp, newest first
-        feedback_list.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
-        return feedback_list
+        ratings = ratings_from(firestore_cache.document(AGGREGATES_COLLECTION, FEEDBACK_RATINGS_DOC_ID))
+        return rating_summary(ratings or recount_ratings(db), None if filter_type == "All" else filter_type)
+    except Exception as e:
+        st.error(f"Error loading rating summary: {e}")
+        return rating_summary(None)
+
+# Pages of one filter are reused briefly, so paging back and forth or
+# switching filters does not repeat the query on every rerun
+FEEDBACK_CACHE_TTL = float(os.getenv("FEEDBACK_CACHE_TTL", "15"))
+
+def get_feedbacks_page(filter_type: str, cursor=None, page_size: int = 10):
+    """
+    One page of feedbacks, newest first, filtered by type in Firestore
+    (uses the type + created_at composite index in firestore.indexes.json)
+    """
+    if not db:
+        return [], None
+    try:
+        filters = [("type", filter_type)] if filter_type != "All" else []
+        # Document ID is stored for editing/deleting
+        return firestore_cache.page(
+            "feedbacks", "created_at", page_size, cursor, filters=filters, ttl=FEEDBACK_CACHE_TTL
+        )
     except Exception as e:
         st.error(f"Error fetching feedbacks: {e}")
-        return []
+        return [], None
 
 def delete_feedback_from_firebase(feedback_id: str):
     """Delete feedback from Firebase"""
     if not db:
         return False, "Database not initialized."
     try:
-        db.collection("feedbacks").document(feedback_id).delete()
+        delete_feedback(db, feedback_id)
+        firestore_cache.invalidate("feedbacks")
+        firestore_cache.invalidate(AGGREGATES_COLLECTION)
         return True, "Feedback deleted successfully!"
     except Exception as e:
         return False, f"Error deleting feedback: {str(e)}"
@@ -247,68 +275,81 @@ with tab2:
     st.markdown("### 📜 Recent Reviews")
     
     if st.button("🔄 Refresh Feedbacks"):
+        firestore_cache.invalidate("feedbacks")
+        reset_paginated_list("feedback_list")
         st.rerun()
     
     filter_type = st.selectbox("Show Feedback For:", ["All", "Donor", "NGO"])
     
-    feedbacks = get_all_feedbacks()
-    filtered_feedbacks = feedbacks if filter_type == "All" else [f for f in feedbacks if f["type"] == filter_type]
-
-    if filtered_feedbacks:
-        for feedback in filtered_feedbacks:
-            # Format timestamp
-            created_at = "Recently"
-            if 'created_at' in feedback and feedback['created_at']:
-                ts = feedback['created_at']
-                if hasattr(ts, "strftime"):
-                    created_at = ts.strftime("%Y-%m-%d %I:%M %p")
-                elif hasattr(ts, "to_datetime"):
-                    created_at = ts.to_datetime().strftime("%Y-%m-%d %I:%M %p")
-            
-            col1, col2 = st.columns([0.9, 0.1])
-            with col1:
-                st.markdown(f"""
-                <div class="feedback-card">
-                    <div class="feedback-content">
-                        <strong>📌 For {feedback['type']}</strong> | 
-                        <span class="star">{"⭐" * feedback['rating']}</span><br>
-                        <p>💬 {feedback['message']}</p>
-                        <small>👤 {feedback['author']} | 📅 {created_at}</small>
-                    </div>
+    summary = get_rating_summary(filter_type)
+    if summary["count"]:
+        col_avg, col_count, col_chart = st.columns([1, 1, 3])
+        with col_avg:
+            st.metric("Average Rating", f"{summary['average']:.1f} ⭐")
+        with col_count:
+            st.metric("Reviews", summary["count"])
+        with col_chart:
+            st.bar_chart({"Reviews": {f"{r} ⭐": n for r, n in summary["histogram"].items()}}, height=160)
+    
+    def render_feedback(feedback):
+        # Format timestamp
+        created_at = "Recently"
+        if 'created_at' in feedback and feedback['created_at']:
+            ts = feedback['created_at']
+            if hasattr(ts, "strftime"):
+                created_at = ts.strftime("%Y-%m-%d %I:%M %p")
+            elif hasattr(ts, "to_datetime"):
+                created_at = ts.to_datetime().strftime("%Y-%m-%d %I:%M %p")
+
+        col1, col2 = st.columns([0.9, 0.1])
+        with col1:
+            st.markdown(f"""
+            <div class="feedback-card">
+                <div class="feedback-content">
+                    <strong>📌 For {feedback['type']}</strong> | 
+                    <span class="star">{"⭐" * feedback['rating']}</span><br>
+                    <p>💬 {feedback['message']}</p>
+                    <small>👤 {feedback['author']} | 📅 {created_at}</small>
                 </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                # Delete button with confirmation
-                if st.button("🗑️", key=f"delete_{feedback['id']}"):
-                    if st.session_state.get('confirm_delete') == feedback['id']:
+            </div>
+            """, unsafe_allow_html=True)
+
+        with col2:
+            # Delete button with confirmation
+            if st.button("🗑️", key=f"delete_{feedback['id']}"):
+                if st.session_state.get('confirm_delete') == feedback['id']:
+                    success, msg = delete_feedback_from_firebase(feedback['id'])
+                    if success:
+                        st.success("🗑️ Feedback deleted!")
+                        st.session_state.confirm_delete = None
+                        st.rerun()
+                    else:
+                        st.error(f"❌ {msg}")
+                else:
+                    st.session_state.confirm_delete = feedback['id']
+                    st.rerun()
+
+            # Show confirmation message
+            if st.session_state.get('confirm_delete') == feedback['id']:
+                st.warning("⚠️ Delete this?")
+                col_a, col_b = st.columns(2)
+                with col_a:
+                    if st.button("✅ Yes", key=f"confirm_del_{feedback['id']}"):
                         success, msg = delete_feedback_from_firebase(feedback['id'])
                         if success:
-                            st.success("🗑️ Feedback deleted!")
+                            st.success("🗑️ Deleted!")
                             st.session_state.confirm_delete = None
                             st.rerun()
                         else:
                             st.error(f"❌ {msg}")
-                    else:
-                        st.session_state.confirm_delete = feedback['id']
+                with col_b:
+                    if st.button("❌ No", key=f"cancel_del_{feedback['id']}"):
+                        st.session_state.confirm_delete = None
                         st.rerun()
-                
-                # Show confirmation message
-                if st.session_state.get('confirm_delete') == feedback['id']:
-                    st.warning("⚠️ Delete this?")
-                    col_a, col_b = st.columns(2)
-                    with col_a:
-                        if st.button("✅ Yes", key=f"confirm_del_{feedback['id']}"):
-                            success, msg = delete_feedback_from_firebase(feedback['id'])
-                            if success:
-                                st.success("🗑️ Deleted!")
-                                st.session_state.confirm_delete = None
-                                st.rerun()
-                            else:
-                                st.error(f"❌ {msg}")
-                    with col_b:
-                        if st.button("❌ No", key=f"cancel_del_{feedback['id']}"):
-                            st.session_state.confirm_delete = None
-                            st.rerun()
-    else:
-        st.info("🌟 Be the first to share your feedback! 🌟")
\ No newline at end of file
+
+    paginated_list(
+        "feedback_list", lambda cursor, page_size: get_feedbacks_page(filter_type, cursor, page_size),
+        render_feedback, signature=filter_type, default_page_size=10,
+        compact_columns=("type", "rating", "message", "author", "created_at"),
+        empty_message="🌟 Be the first to share your feedback! 🌟",
+    )
\ No newline at end of file
@@ -1,5 +1,6 @@
 import streamlit as st
-import base64
+
+from utils.static_assets import asset_srcset, asset_url
 
 # Page configuration
 st.set_page_config(
@@ -254,10 +255,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def get_image_as_base64(path):
-    with open(path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode('utf-8')
-
 # Main header
 st.markdown("""
 <div class="main-header">
@@ -353,15 +350,15 @@ st.markdown("---")
 
 # Impact statistics
 try:
-    # Get banner as base64
-    banner_path = "assets/Banner - Annapurna.png"
-    banner_b64 = get_image_as_base64(banner_path)
+    # Banner served as a static, browser-cached WebP instead of an inline data URI
+    banner = "Banner - Annapurna.png"
+    banner_url = asset_url(banner, 1600)
+    if banner_url is None:
+        raise FileNotFoundError(f"assets/{banner} has no built variant")
     st.markdown(f"""
-    <div style="
-        background-image: url('data:image/png;base64,{banner_b64}');
-        background-size: contain;
-        background-position: center;
-        background-repeat: no-repeat;
+    <img src="{banner_url}" srcset="{asset_srcset(banner)}" sizes="100vw" alt="Annapurna banner" style="
+        display: block;
+        object-fit: contain;
         width: 100%;
         height: 60vh;
         min-height: 200px;
@@ -369,7 +366,6 @@ try:
         border-radius: 5px;
         box-shadow: 0 10px 10px -3px rgba(0, 0, 0, 0.2);
     ">
-    </div>
     """, unsafe_allow_html=True)
 except Exception as e:
     st.error(f"Error loading banner: {str(e)}")
@@ -0,0 +1,122 @@
+import os
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.aggregates import (
+    AGGREGATES_COLLECTION,
+    COUNTED_COLLECTIONS,
+    COUNTS_DOC_ID,
+    FEEDBACK_RATINGS_DOC_ID,
+    counts_from,
+    rating_summary,
+    ratings_from,
+    recount,
+    recount_ratings,
+)
+from utils.donations import count_by
+from utils.firestore_cache import Filters
+from utils.paginated_list import Cursor, slice_page
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", "20"))
+
+# Field each collection is listed by, newest first. Documents without it
+# are left out of ordered Firestore queries.
+ORDER_FIELDS = {
+    "users": "created_at",
+    "ngos": "created_at",
+    "volunteers": "registration_date",
+    "donations": "created_at",
+    "feedbacks": "created_at",
+}
+
+
+def _newest_first(rows: List[Dict[str, Any]], field: str) -> List[Dict[str, Any]]:
+    return sorted(rows, key=lambda r: (r.get(field) is not None, r.get(field)), reverse=True)
+
+
+class AdminDataService:
+    """
+    Data access for the Admin dashboard.
+
+    Stat-card counts come from the maintained counts document (see
+    utils.aggregates), so no collection is scanned to show them. Rows are
+    read one page at a time, only for the section being viewed. Text
+    search has no Firestore equivalent and falls back to the cached
+    collection view of that one collection.
+    """
+
+    def __init__(self, db, cache):
+        self.db = db
+        self.cache = cache
+
+    def counts(self) -> Dict[str, int]:
+        """Document count per collection."""
+        if self.db is None:
+            return {c: 0 for c in COUNTED_COLLECTIONS}
+
+        # The aggregates collection is a handful of documents, so a live
+        # view of it keeps the cards current across processes
+        counts = counts_from(self.cache.document(AGGREGATES_COLLECTION, COUNTS_DOC_ID))
+        return counts if counts is not None else recount(self.db)
+
+    def ratings(self, feedback_type: Optional[str] = None) -> Dict[str, Any]:
+        """Feedback count, average and histogram (see aggregates.rating_summary)."""
+        if self.db is None:
+            return rating_summary(None, feedback_type)
+        ratings = ratings_from(self.cache.document(AGGREGATES_COLLECTION, FEEDBACK_RATINGS_DOC_ID))
+        return rating_summary(ratings or recount_ratings(self.db), feedback_type)
+
+    def count(self, collection: str, filters: Filters = ()) -> int:
+        """Count of documents matching equality filters, via a count() aggregation."""
+        if not filters:
+            return self.counts()[collection]
+        return self.cache.count(collection, filters)
+
+    def page(self, collection: str, cursor: Cursor = None, page_size: int = ADMIN_PAGE_SIZE,
+             filters: Filters = (), search: str = "",
+             search_fields: Sequence[str] = ()) -> Tuple[List[Dict[str, Any]], Cursor]:
+        """One page of rows and the cursor of the next page (None on the last page)."""
+        if self.db is None:
+            return [], None
+        if search:
+            return slice_page(self.search(collection, search, search_fields, filters), cursor, page_size)
+        return self.cache.page(collection, ORDER_FIELDS[collection], page_size, cursor,
+                               filters=filters, id_field="doc_id")
+
+    def search(self, collection: str, term: str, fields: Sequence[str], filters: Filters = ()) -> List[Dict[str, Any]]:
+        """Rows where any of `fields` contains `term`, case-insensitively, newest first."""
+        term = term.strip().lower()
+
+        def load():
+            rows = [
+                r for r in self.cache.collection(collection, id_field="doc_id")
+                if all(r.get(f) == v for f, v in filters)
+                and any(term in str(r.get(f) or "").lower() for f in fields)
+            ]
+            return _newest_first(rows, ORDER_FIELDS[collection])
+
+        return self.cache.query(collection, ("search", term, tuple(fields), tuple(filters)), load)
+
+    def donation_counts(self, field: str) -> Dict[str, Dict[str, int]]:
+        """
+        Donation totals per value of `field` (donor_email or accepted_by_email),
+        grouped once per load of the donations view rather than per row.
+        """
+        if self.db is None:
+            return {}
+        return self.cache.query(
+            "donations", ("count_by", field),
+            lambda: count_by(self.cache.collection("donations"), field),
+        )
+
+    def refresh(self, collection: str) -> None:
+        """Drop cached rows of one collection and recount, e.g. after console edits."""
+        self.cache.invalidate(collection)
+        if self.db is not None:
+            recount(self.db)
+            if collection == "feedbacks":
+                recount_ratings(self.db)
+        self.cache.invalidate(AGGREGATES_COLLECTION)
@@ -0,0 +1,192 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition, NotFound
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Maintained aggregates live in one small collection, one document per kind
+AGGREGATES_COLLECTION = "aggregates"
+COUNTS_DOC_ID = "collection_counts"
+COUNTED_COLLECTIONS = ("users", "ngos", "volunteers", "donations", "feedbacks")
+
+# Per feedback type: {"count", "sum", "histogram": {"1".."5": n}}
+FEEDBACK_RATINGS_DOC_ID = "feedback_ratings"
+FEEDBACK_TYPES = ("Donor", "NGO")
+RATING_VALUES = range(1, 6)
+
+# Extra aggregate writes committed in the same batch: (doc ref, merged fields)
+Updates = Sequence[Tuple[Any, Dict[str, Any]]]
+
+
+def counts_ref(db):
+    return db.collection(AGGREGATES_COLLECTION).document(COUNTS_DOC_ID)
+
+
+def ratings_ref(db):
+    return db.collection(AGGREGATES_COLLECTION).document(FEEDBACK_RATINGS_DOC_ID)
+
+
+def _create_batch(db, collection: str, data: Dict[str, Any], doc_id: Optional[str], updates: Updates = ()):
+    doc_ref = db.collection(collection).document(doc_id) if doc_id else db.collection(collection).document()
+    batch = db.batch()
+    # create() fails if the document exists, so a duplicate never double-counts
+    batch.create(doc_ref, data)
+    batch.set(counts_ref(db), {collection: firestore.Increment(1)}, merge=True)
+    for ref, fields in updates:
+        batch.set(ref, fields, merge=True)
+    return batch, doc_ref
+
+
+def _delete_batch(db, collection: str, doc_id: str, updates: Updates = (), option=None):
+    doc_ref = db.collection(collection).document(doc_id)
+    batch = db.batch()
+    # The precondition (exists, unless a stricter one is given) makes deleting
+    # a missing document fail instead of decrementing the count for nothing
+    batch.delete(doc_ref, option=option or db.write_option(exists=True))
+    batch.set(counts_ref(db), {collection: firestore.Increment(-1)}, merge=True)
+    for ref, fields in updates:
+        batch.set(ref, fields, merge=True)
+    return batch
+
+
+def create_counted(db, collection: str, data: Dict[str, Any], doc_id: Optional[str] = None,
+                   updates: Updates = ()):
+    """
+    Create a document and bump its collection count (plus any `updates`)
+    in one atomic batch. Raises google.api_core.exceptions.AlreadyExists
+    if doc_id is taken. Returns the new document reference.
+    """
+    batch, doc_ref = _create_batch(db, collection, data, doc_id, updates)
+    batch.commit()
+    return doc_ref
+
+
+async def create_counted_async(db, collection: str, data: Dict[str, Any], doc_id: Optional[str] = None,
+                               updates: Updates = ()):
+    """Same as create_counted() for a Firestore AsyncClient."""
+    batch, doc_ref = _create_batch(db, collection, data, doc_id, updates)
+    await batch.commit()
+    return doc_ref
+
+
+def delete_counted(db, collection: str, doc_id: str, updates: Updates = (), option=None) -> bool:
+    """
+    Delete a document and decrement its collection count (plus any
+    `updates`) atomically. Returns False if the document was already gone
+    or, with a last_update_time `option`, changed since it was read.
+    """
+    try:
+        _delete_batch(db, collection, doc_id, updates, option).commit()
+    except (NotFound, FailedPrecondition):
+        logger.info(f"{collection}/{doc_id} was already deleted or changed")
+        return False
+    return True
+
+
+# --- Feedback ratings ---
+def _rating_updates(db, feedback: Dict[str, Any], sign: int) -> List[Tuple[Any, Dict[str, Any]]]:
+    feedback_type, rating = feedback.get("type"), feedback.get("rating")
+    if not feedback_type or not isinstance(rating, int) or rating not in RATING_VALUES:
+        return []
+    fields = {
+        feedback_type: {
+            "count": firestore.Increment(sign),
+            "sum": firestore.Increment(sign * rating),
+            "histogram": {str(rating): firestore.Increment(sign)},
+        }
+    }
+    return [(ratings_ref(db), fields)]
+
+
+def create_feedback(db, feedback: Dict[str, Any]):
+    """Save a feedback and add its rating to its type's aggregate, atomically."""
+    return create_counted(db, "feedbacks", feedback, updates=_rating_updates(db, feedback, 1))
+
+
+def delete_feedback(db, feedback_id: str) -> bool:
+    """
+    Delete a feedback and take its rating out of the aggregate. The rating
+    is read first; the delete only commits if the document is unchanged
+    since, so concurrent deletes never subtract it twice.
+    """
+    snapshot = db.collection("feedbacks").document(feedback_id).get()
+    if not snapshot.exists:
+        return False
+    return delete_counted(
+        db, "feedbacks", feedback_id,
+        updates=_rating_updates(db, snapshot.to_dict() or {}, -1),
+        option=db.write_option(last_update_time=snapshot.update_time),
+    )
+
+
+def recount_ratings(db) -> Dict[str, Dict[str, Any]]:
+    """
+    Rebuild the rating aggregates with server-side count()/sum()
+    aggregations, one set per feedback type, and store them.
+    """
+    # Increments made before the first backfill leave a document without
+    # the marker, so ratings_from() still asks for a full recount
+    ratings = {"backfilled": True}
+    feedbacks = db.collection("feedbacks")
+    for feedback_type in FEEDBACK_TYPES:
+        query = feedbacks.where("type", "==", feedback_type)
+        totals = {r.alias: r.value for r in query.count(alias="count").sum("rating", alias="sum").get()[0]}
+        ratings[feedback_type] = {
+            "count": int(totals["count"]),
+            "sum": int(totals["sum"] or 0),
+            "histogram": {
+                str(r): int(query.where("rating", "==", r).count().get()[0][0].value) for r in RATING_VALUES
+            },
+        }
+    ratings_ref(db).set(ratings)
+    logger.info(f"Recounted feedback ratings: {ratings}")
+    return ratings
+
+
+def ratings_from(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The ratings document if it has been backfilled, else None."""
+    return doc if doc and doc.get("backfilled") else None
+
+
+def rating_summary(ratings: Optional[Dict[str, Any]], feedback_type: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Count, average and 1-5 histogram from the ratings document, for one
+    type or (feedback_type None) all types combined.
+    """
+    types = FEEDBACK_TYPES if feedback_type is None else (feedback_type,)
+    count, total = 0, 0
+    histogram = {r: 0 for r in RATING_VALUES}
+    for t in types:
+        entry = (ratings or {}).get(t) or {}
+        count += max(int(entry.get("count", 0)), 0)
+        total += max(int(entry.get("sum", 0)), 0)
+        for r in RATING_VALUES:
+            histogram[r] += max(int((entry.get("histogram") or {}).get(str(r), 0)), 0)
+    return {"count": count, "average": total / count if count else 0.0, "histogram": histogram}
+
+
+def recount(db) -> Dict[str, int]:
+    """
+    Recompute every count with server-side count() aggregations and store
+    them. Used to backfill the counts document and to repair drift from
+    writes made outside this code (e.g. the Firebase console).
+    """
+    counts = {}
+    for collection in COUNTED_COLLECTIONS:
+        result = db.collection(collection).count().get()
+        counts[collection] = int(result[0][0].value)
+    # Like the ratings, increments made before the first recount leave a
+    # document without the marker, which counts_from() does not trust
+    counts_ref(db).set(dict(counts, backfilled=True))
+    logger.info(f"Recounted collections: {counts}")
+    return counts
+
+
+def counts_from(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+    """The counts in a backfilled counts document, or None if it needs a recount."""
+    if not doc or not doc.get("backfilled") or any(c not in doc for c in COUNTED_COLLECTIONS):
+        return None
+    return {c: max(int(doc[c]), 0) for c in COUNTED_COLLECTIONS}
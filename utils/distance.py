@@ -0,0 +1,103 @@
+import math
+import logging
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.lazy_imports import geodesic, is_available
+
+# geopy is only imported once a geodesic refinement actually runs
+GEOPY_AVAILABLE = is_available("geopy")
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Accuracy modes for nearest(): "haversine" ranks and reports spherical
+# distances; "geodesic" ranks with haversine, then refines the top-k results
+# on the WGS-84 ellipsoid (geopy) and re-sorts them.
+ACCURACY_MODES = ("haversine", "geodesic")
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometers (scalar)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_batch(origin: Tuple[float, float], lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """Great-circle distances in kilometers from one origin to N points in a single call."""
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lngs = np.radians(np.asarray(lngs, dtype=np.float64))
+    phi1 = math.radians(origin[0])
+    lmb1 = math.radians(origin[1])
+    a = (
+        np.sin((lats - phi1) / 2) ** 2
+        + math.cos(phi1) * np.cos(lats) * np.sin((lngs - lmb1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def geodesic_batch(origin: Tuple[float, float], lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """
+    Ellipsoidal distances in kilometers. Runs one geopy call per point, so only
+    use it on small, already-ranked sets; falls back to haversine without geopy.
+    """
+    if not GEOPY_AVAILABLE:
+        return haversine_batch(origin, lats, lngs)
+    return np.array(
+        [geodesic(origin, (lat, lng)).kilometers for lat, lng in zip(lats, lngs)],
+        dtype=np.float64,
+    )
+
+
+def nearest(
+    origin: Tuple[float, float],
+    lats: Sequence[float],
+    lngs: Sequence[float],
+    max_km: Optional[float] = None,
+    top_k: Optional[int] = None,
+    accuracy: str = "haversine",
+    refine_k: int = 10,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rank N destinations by distance from origin.
+
+    Returns (indices, distances_km) sorted nearest first, limited to points
+    within max_km and to the top_k closest when given. With
+    accuracy="geodesic", the first refine_k results are recomputed on the
+    ellipsoid and re-sorted.
+    """
+    if accuracy not in ACCURACY_MODES:
+        raise ValueError(f"Unknown accuracy mode: {accuracy}")
+
+    distances = haversine_batch(origin, lats, lngs)
+    indices = np.arange(distances.size)
+    if max_km is not None:
+        # Small slack so ellipsoid refinement can't drop borderline points
+        slack = 1.005 if accuracy == "geodesic" else 1.0
+        indices = indices[distances <= max_km * slack]
+
+    if top_k is not None and top_k < indices.size:
+        part = np.argpartition(distances[indices], top_k)[:top_k]
+        indices = indices[part]
+    indices = indices[np.argsort(distances[indices], kind="stable")]
+    result = distances[indices]
+
+    if accuracy == "geodesic" and indices.size:
+        k = min(refine_k, indices.size)
+        lats_arr = np.asarray(lats, dtype=np.float64)
+        lngs_arr = np.asarray(lngs, dtype=np.float64)
+        result = result.copy()
+        result[:k] = geodesic_batch(origin, lats_arr[indices[:k]], lngs_arr[indices[:k]])
+        order = np.argsort(result, kind="stable")
+        indices, result = indices[order], result[order]
+        if max_km is not None:
+            keep = result <= max_km
+            indices, result = indices[keep], result[keep]
+
+    return indices, result
@@ -0,0 +1,115 @@
+import logging
+from typing import Any, Dict, Iterable
+
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DonationNotFound(LookupError):
+    """The donation document does not exist."""
+
+
+class DonationUnavailable(ValueError):
+    """The donation is no longer Pending (e.g. another NGO accepted it first)."""
+
+    def __init__(self, current_status: str):
+        self.current_status = current_status
+        super().__init__(f"Donation is already {current_status} and cannot be accepted.")
+
+
+def count_by(donations: Iterable[Dict[str, Any]], field: str) -> Dict[str, Dict[str, int]]:
+    """
+    Group donations by `field` (e.g. donor_email, accepted_by_email) in one
+    pass. Returns value -> {"total", "accepted", "pending"}; donations
+    without the field are skipped.
+    """
+    groups: Dict[str, Dict[str, int]] = {}
+    for donation in donations:
+        key = donation.get(field)
+        if not key:
+            continue
+        counts = groups.get(key)
+        if counts is None:
+            counts = groups[key] = {"total": 0, "accepted": 0, "pending": 0}
+        counts["total"] += 1
+        status = donation.get("status", "Pending")
+        if status == "Accepted":
+            counts["accepted"] += 1
+        elif status == "Pending":
+            counts["pending"] += 1
+    return groups
+
+
+def acceptance_fields(ngo_name: str, ngo_email: str) -> Dict[str, Any]:
+    """Fields written when an NGO accepts a donation."""
+    return {
+        "status": "Accepted",
+        "accepted_by_ngo": ngo_name,
+        "accepted_by_email": ngo_email,
+        "accepted_at": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def _pending_data(snapshot, donation_id: str) -> Dict[str, Any]:
+    if not snapshot.exists:
+        raise DonationNotFound(donation_id)
+    data = snapshot.to_dict() or {}
+    current_status = data.get("status", "Pending")
+    if current_status != "Pending":
+        raise DonationUnavailable(current_status)
+    return data
+
+
+def _accepted_data(data: Dict[str, Any], fields: Dict[str, Any], write_result, doc_id: str) -> Dict[str, Any]:
+    data.update(fields)
+    # SERVER_TIMESTAMP resolves to the commit time of this write
+    data["accepted_at"] = write_result.update_time
+    data["id"] = doc_id
+    return data
+
+
+def accept_donation(db, donation_id: str, ngo_name: str, ngo_email: str) -> Dict[str, Any]:
+    """
+    Accept a Pending donation for an NGO, safely under concurrent clicks.
+
+    Reads the document once and writes with an `update_time` precondition,
+    so if anyone else changed it in between (e.g. another NGO accepted it)
+    the write is rejected instead of silently overwriting. Returns the
+    accepted donation built from the read plus the write result, with the
+    document id under "id".
+    """
+    doc_ref = db.collection("donations").document(donation_id)
+    snapshot = doc_ref.get()
+    data = _pending_data(snapshot, donation_id)
+
+    fields = acceptance_fields(ngo_name, ngo_email)
+    try:
+        write_result = doc_ref.update(
+            fields, option=db.write_option(last_update_time=snapshot.update_time)
+        )
+    except FailedPrecondition:
+        logger.info(f"Donation {donation_id} changed while accepting; rejecting {ngo_email}")
+        raise DonationUnavailable("Accepted")
+
+    return _accepted_data(data, fields, write_result, doc_ref.id)
+
+
+async def accept_donation_async(db, donation_id: str, ngo_name: str, ngo_email: str) -> Dict[str, Any]:
+    """Same as accept_donation() for a Firestore AsyncClient."""
+    doc_ref = db.collection("donations").document(donation_id)
+    snapshot = await doc_ref.get()
+    data = _pending_data(snapshot, donation_id)
+
+    fields = acceptance_fields(ngo_name, ngo_email)
+    try:
+        write_result = await doc_ref.update(
+            fields, option=db.write_option(last_update_time=snapshot.update_time)
+        )
+    except FailedPrecondition:
+        logger.info(f"Donation {donation_id} changed while accepting; rejecting {ngo_email}")
+        raise DonationUnavailable("Accepted")
+
+    return _accepted_data(data, fields, write_result, doc_ref.id)
@@ -0,0 +1,334 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from firebase_admin import firestore
+
+from firebase_config import db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fallback freshness bound used when a snapshot listener is not running
+FIRESTORE_CACHE_TTL = float(os.getenv("FIRESTORE_CACHE_TTL", "60"))
+FIRESTORE_QUERY_CACHE_SIZE = int(os.getenv("FIRESTORE_QUERY_CACHE_SIZE", "256"))
+# Set to "0" to disable on_snapshot listeners (e.g. on hosts without gRPC streaming)
+FIRESTORE_CACHE_LISTEN = os.getenv("FIRESTORE_CACHE_LISTEN", "1") != "0"
+
+# (field, value) equality filters
+Filters = Sequence[Tuple[str, Any]]
+# Called with changed documents by id (None when deleted) and whether they
+# are the whole collection, replacing everything seen before
+ChangeCallback = Callable[[Dict[str, Optional[Dict[str, Any]]], bool], None]
+
+
+def _filtered(db, name: str, filters: Filters):
+    query = db.collection(name)
+    for field, value in filters:
+        query = query.where(field, "==", value)
+    return query
+
+
+def fetch_page(db, name: str, order_by: str, page_size: int, start_after=None,
+               filters: Filters = (), id_field: str = "id") -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+    """
+    Read one page of a collection, newest first. Fetches one extra document
+    to know whether there is a next page; returns the rows and the snapshot
+    to start the next page after, or None on the last page.
+    """
+    query = _filtered(db, name, filters).order_by(order_by, direction=firestore.Query.DESCENDING)
+    if start_after is not None:
+        query = query.start_after(start_after)
+    docs = list(query.limit(page_size + 1).stream())
+    next_cursor = docs[page_size - 1] if len(docs) > page_size else None
+    rows = [dict(doc.to_dict() or {}, **{id_field: doc.id}) for doc in docs[:page_size]]
+    return rows, next_cursor
+
+
+class CollectionView:
+    """
+    In-memory materialized view of one Firestore collection.
+
+    Kept fresh by an `on_snapshot` listener; if the listener cannot be started
+    or dies, the view falls back to a full reload once its TTL expires.
+    """
+
+    def __init__(self, db, name: str, ttl: float = FIRESTORE_CACHE_TTL, listen: bool = FIRESTORE_CACHE_LISTEN):
+        self.db = db
+        self.name = name
+        self.ttl = ttl
+        self.listen = listen
+        self.version = 0
+        self._lock = threading.Lock()
+        # Serializes listener startup and full reloads, so sessions arriving
+        # together share one listener and one collection scan
+        self._refresh_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at = 0.0
+        self._watch = None
+        # Snapshots are tagged with the watch that sent them; the view is
+        # only live once the current watch delivered its first snapshot
+        self._watch_id = 0
+        self._synced_watch_id = -1
+        self._listen_retry_at = 0.0
+        self._subscribers: List[ChangeCallback] = []
+
+    def _listener_active(self) -> bool:
+        return self._watch is not None and getattr(self._watch, "is_active", False)
+
+    def _listener_live(self) -> bool:
+        return self._listener_active() and self._synced_watch_id == self._watch_id
+
+    def _start_listener(self) -> None:
+        synced = threading.Event()
+        with self._lock:
+            self._watch_id += 1
+            watch_id = self._watch_id
+
+        def on_snapshot(docs, changes, read_time):
+            self._on_snapshot(watch_id, docs, changes)
+            synced.set()
+
+        try:
+            self._watch = self.db.collection(self.name).on_snapshot(on_snapshot)
+            # The first snapshot delivers the whole collection
+            if not synced.wait(timeout=10):
+                logger.warning(f"Snapshot listener for '{self.name}' did not deliver in time")
+        except Exception as e:
+            logger.warning(f"Could not start snapshot listener for '{self.name}': {e}")
+            self._watch = None
+            self._listen_retry_at = time.monotonic() + self.ttl
+
+    def _on_snapshot(self, watch_id: int, docs, changes) -> None:
+        with self._lock:
+            if watch_id != self._watch_id:
+                # Late delivery from a listener that has been replaced
+                return
+            if self._synced_watch_id != watch_id:
+                # First snapshot of this watch: the whole collection. Replace
+                # the view, dropping documents deleted while no listener ran
+                self._docs = {doc.id: doc.to_dict() or {} for doc in docs}
+                self._synced_watch_id = watch_id
+                self._notify(self._docs, True)
+            else:
+                changed = {}
+                for change in changes:
+                    doc = change.document
+                    if change.type.name == "REMOVED":
+                        self._docs.pop(doc.id, None)
+                        changed[doc.id] = None
+                    else:
+                        self._docs[doc.id] = changed[doc.id] = doc.to_dict() or {}
+                self._notify(changed, False)
+            self._loaded_at = time.monotonic()
+            self.version += 1
+        self._ready.set()
+
+    def _reload(self) -> None:
+        docs = {doc.id: doc.to_dict() or {} for doc in self.db.collection(self.name).stream()}
+        with self._lock:
+            self._docs = docs
+            self._notify(docs, True)
+            self._loaded_at = time.monotonic()
+            self.version += 1
+        self._ready.set()
+
+    def _notify(self, docs: Dict[str, Optional[Dict[str, Any]]], reset: bool) -> None:
+        # Runs under self._lock, so subscribers see changes in order
+        for callback in self._subscribers:
+            try:
+                callback({doc_id: dict(data) if data is not None else None for doc_id, data in docs.items()}, reset)
+            except Exception as e:
+                logger.error(f"Change subscriber for '{self.name}' failed: {e}")
+
+    def subscribe(self, callback: ChangeCallback) -> None:
+        """
+        Call `callback` with every change to the view, starting with its
+        current contents if loaded. Callbacks run on the listener thread
+        while the view is locked, so they must not read the view.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            if self._ready.is_set():
+                self._notify(self._docs, True)
+
+    def _listen_due(self) -> bool:
+        return self.listen and time.monotonic() >= self._listen_retry_at
+
+    def _stale(self) -> bool:
+        return not self._ready.is_set() or time.monotonic() - self._loaded_at > self.ttl
+
+    def refresh(self) -> None:
+        """Ensure the view is populated and fresh."""
+        if self._listener_live():
+            return
+        if self._watch is None and not self._stale() and not self._listen_due():
+            return
+        with self._refresh_lock:
+            if self._listener_live():
+                return
+            if self._watch is not None and not self._listener_active():
+                # Listener died; fall back to TTL reloads and retry it later
+                self.close()
+                self._listen_retry_at = time.monotonic() + self.ttl
+            if self._watch is None and self._listen_due():
+                self._start_listener()
+                if self._listener_live():
+                    return
+            if self._stale():
+                self._reload()
+
+    def invalidate(self) -> None:
+        """Force a reload on next read unless a live listener keeps the view current."""
+        with self._lock:
+            self._loaded_at = 0.0
+            self.version += 1
+
+    def documents(self, id_field: str = "id") -> List[Dict[str, Any]]:
+        """Return copies of all documents, each with its document id under id_field."""
+        self.refresh()
+        with self._lock:
+            return [dict(data, **{id_field: doc_id}) for doc_id, data in self._docs.items()]
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of one document, or None if it does not exist."""
+        self.refresh()
+        with self._lock:
+            data = self._docs.get(doc_id)
+            return dict(data) if data is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            # Ignore anything the old listener still delivers
+            self._watch_id += 1
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception:
+                pass
+            self._watch = None
+
+
+class FirestoreCache:
+    """
+    Process-wide caching data-access layer around a Firestore client.
+
+    Whole collections are served from CollectionViews; derived per-query
+    results are kept in an LRU cache that is invalidated whenever the
+    underlying collection view changes, with a TTL as a fallback. Queries
+    that read Firestore directly (e.g. one page of a collection) can skip
+    the view with live=False; those are dropped on invalidate() or TTL.
+    """
+
+    def __init__(self, db, ttl: float = FIRESTORE_CACHE_TTL, max_queries: int = FIRESTORE_QUERY_CACHE_SIZE):
+        self.db = db
+        self.ttl = ttl
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        self._views: Dict[str, CollectionView] = {}
+        self._generations: Dict[str, int] = {}
+        self._queries: "OrderedDict[Tuple[str, Hashable], Tuple[int, float, Any]]" = OrderedDict()
+
+    def view(self, name: str) -> CollectionView:
+        with self._lock:
+            view = self._views.get(name)
+            if view is None:
+                view = CollectionView(self.db, name, ttl=self.ttl)
+                self._views[name] = view
+            return view
+
+    def subscribe(self, name: str, callback: ChangeCallback) -> None:
+        """Follow the changes of a collection's view (see CollectionView.subscribe)."""
+        self.view(name).subscribe(callback)
+
+    def refresh(self, name: str) -> None:
+        """Make sure a collection's view is loaded and current, without copying it."""
+        if self.db is not None:
+            self.view(name).refresh()
+
+    def collection(self, name: str, id_field: str = "id") -> List[Dict[str, Any]]:
+        """All documents of a collection, served from memory."""
+        if self.db is None:
+            return []
+        return self.view(name).documents(id_field)
+
+    def query(self, name: str, key: Hashable, loader: Callable[[], Any], live: bool = True,
+              ttl: Optional[float] = None) -> Any:
+        """
+        Cache the result of `loader()` under (collection, key). The entry is
+        dropped when the collection view changes or the TTL (default: the
+        cache's) expires. With live=False the collection view is never
+        loaded, and only invalidate() or the TTL drop the entry.
+        """
+        if self.db is None:
+            return loader()
+        if live:
+            view = self.view(name)
+            view.refresh()
+            version = view.version
+        else:
+            with self._lock:
+                version = -1 - self._generations.get(name, 0)
+        cache_key = (name, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._queries.get(cache_key)
+            if entry and entry[0] == version and entry[1] > now:
+                self._queries.move_to_end(cache_key)
+                return entry[2]
+
+        result = loader()
+        with self._lock:
+            self._queries[cache_key] = (version, now + (self.ttl if ttl is None else ttl), result)
+            self._queries.move_to_end(cache_key)
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        return result
+
+    def document(self, name: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """One document of a small collection, served from its live view."""
+        if self.db is None:
+            return None
+        return self.view(name).get(doc_id)
+
+    def page(self, name: str, order_by: str, page_size: int, cursor=None, filters: Filters = (),
+             id_field: str = "id", ttl: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+        """One page read straight from Firestore (see fetch_page), cached without a view."""
+        if self.db is None:
+            return [], None
+        key = ("page", order_by, tuple(filters), getattr(cursor, "id", None), page_size, id_field)
+        return self.query(
+            name, key,
+            lambda: fetch_page(self.db, name, order_by, page_size, cursor, filters, id_field),
+            live=False, ttl=ttl,
+        )
+
+    def count(self, name: str, filters: Filters = ()) -> int:
+        """Matching document count via a server-side count() aggregation."""
+        if self.db is None:
+            return 0
+        return self.query(
+            name, ("count", tuple(filters)),
+            lambda: int(_filtered(self.db, name, filters).count().get()[0][0].value),
+            live=False,
+        )
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Invalidate one collection (or all) after a local write."""
+        with self._lock:
+            views = [self._views[name]] if name in self._views else (
+                list(self._views.values()) if name is None else []
+            )
+            for key in [k for k in self._queries if name is None or k[0] == name]:
+                del self._queries[key]
+            for key in ([name] if name is not None else list(self._generations)):
+                self._generations[key] = self._generations.get(key, 0) + 1
+        for view in views:
+            view.invalidate()
+
+
+firestore_cache = FirestoreCache(db)
@@ -0,0 +1,310 @@
+import os
+import re
+import json
+import time
+import atexit
+import random
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.lazy_imports import googlemaps
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Process-wide on-disk geocode cache, shared by every Streamlit session
+GEOCODE_CACHE_PATH = Path(
+    os.getenv("GEOCODE_CACHE_PATH")
+    or Path(__file__).parent.parent / ".cache" / "geocode_cache.json"
+)
+# Geocoding API budget; Google allows 50 QPS per project by default
+GEOCODE_QPS = float(os.getenv("GEOCODE_QPS", "10"))
+GEOCODE_WORKERS = int(os.getenv("GEOCODE_WORKERS", "8"))
+# Addresses Google found no match for are not looked up again for this long
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", "86400"))
+# Most addresses kept on disk; the least recently used are evicted first
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "5000"))
+# Changes are written out at most this often, in one batch
+GEOCODE_FLUSH_DELAY = float(os.getenv("GEOCODE_FLUSH_DELAY", "5"))
+
+
+# --- Persistent Geocode Store ---
+def normalize_address(address: str) -> str:
+    """Normalize an address so trivially different spellings share a cache key."""
+    return re.sub(r"\s+", " ", (address or "").strip().lower())
+
+
+class GeocodeStore:
+    """
+    Thread-safe address -> (lat, lng) LRU cache persisted as a JSON file.
+    Addresses that could not be geocoded are stored as {"failed_at": epoch}
+    and count as misses for `negative_ttl` seconds. At most `max_entries`
+    addresses are kept, and changes are written out in batches, at most
+    every `flush_delay` seconds, outside the lock that lookups take.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        negative_ttl: float = GEOCODE_NEGATIVE_TTL,
+        max_entries: int = GEOCODE_CACHE_SIZE,
+        flush_delay: float = GEOCODE_FLUSH_DELAY,
+    ):
+        self.path = Path(path)
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._data: Optional[OrderedDict] = None
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def _load(self) -> OrderedDict:
+        if self._data is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = OrderedDict(json.load(f))
+            except FileNotFoundError:
+                self._data = OrderedDict()
+            except Exception as e:
+                logger.warning(f"Could not read geocode cache {self.path}: {e}")
+                self._data = OrderedDict()
+            self._evict()
+        return self._data
+
+    def _evict(self) -> None:
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, address: str) -> Optional[Tuple[float, float]]:
+        key = normalize_address(address)
+        with self._lock:
+            data = self._load()
+            coords = data.get(key)
+            if coords is not None:
+                data.move_to_end(key)
+        return (coords[0], coords[1]) if isinstance(coords, list) else None
+
+    def known_failure(self, address: str) -> bool:
+        """Whether the address recently failed to geocode."""
+        with self._lock:
+            entry = self._load().get(normalize_address(address))
+        return isinstance(entry, dict) and time.time() - entry.get("failed_at", 0) < self.negative_ttl
+
+    def set(self, address: str, coords: Tuple[float, float]) -> None:
+        self._put(address, [coords[0], coords[1]])
+
+    def set_failed(self, address: str) -> None:
+        self._put(address, {"failed_at": time.time()})
+
+    def _put(self, address: str, value: Any) -> None:
+        key = normalize_address(address)
+        with self._lock:
+            data = self._load()
+            data[key] = value
+            data.move_to_end(key)
+            self._evict()
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write pending changes to disk now."""
+        with self._lock:
+            self._flush_timer = None
+            if not self._dirty:
+                return
+            snapshot = dict(self._data)
+            self._dirty = False
+        with self._write_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.warning(f"Could not write geocode cache {self.path}: {e}")
+
+
+geocode_store = GeocodeStore(GEOCODE_CACHE_PATH)
+atexit.register(geocode_store.flush)
+
+
+# --- Concurrent Geocoding Pipeline ---
+class QpsLimiter:
+    """Spaces out calls so that at most `qps` start per second across all threads."""
+
+    def __init__(self, qps: float):
+        self.interval = 1.0 / qps if qps > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _is_retriable(error: Exception) -> bool:
+    if isinstance(error, (googlemaps.exceptions.Timeout,
+                          googlemaps.exceptions.TransportError,
+                          googlemaps.exceptions._RetriableRequest)):
+        return True
+    if isinstance(error, googlemaps.exceptions.ApiError):
+        return error.status in ("OVER_QUERY_LIMIT", "UNKNOWN_ERROR")
+    return False
+
+
+def _to_result(raw: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "formatted_address": raw.get("formatted_address"),
+        "location": raw["geometry"]["location"],
+        "place_id": raw.get("place_id"),
+    }
+
+
+class GeocodePipeline:
+    """
+    Bounded worker pool for Geocoding API calls.
+
+    Identical in-flight addresses share one Future, every request goes through
+    a shared QPS limiter, and transient errors are retried with exponential
+    backoff. Lookups are written to the on-disk geocode store, including
+    addresses with no match, so those are not retried on every search;
+    one-off lookups (a donor's own address) pass `persist=False`.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        max_workers: int = GEOCODE_WORKERS,
+        qps: float = GEOCODE_QPS,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        store: GeocodeStore = geocode_store,
+    ):
+        self.client_factory = client_factory
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.store = store
+        self.limiter = QpsLimiter(qps)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="geocode"
+            )
+        return self._executor
+
+    def submit(self, address: str, client=None, persist: bool = True) -> Future:
+        """Schedule a lookup; returns a Future resolving to a result dict or None."""
+        cached = self.store.get(address)
+        if cached:
+            future: Future = Future()
+            future.set_result({
+                "formatted_address": None,
+                "location": {"lat": cached[0], "lng": cached[1]},
+                "place_id": None,
+            })
+            return future
+        if self.store.known_failure(address):
+            future = Future()
+            future.set_result(None)
+            return future
+
+        key = (normalize_address(address), persist)
+        with self._lock:
+            future = self._in_flight.get(key)
+            started = future is None
+            if started:
+                future = self._get_executor().submit(self._resolve, address, client, persist)
+                self._in_flight[key] = future
+        if started:
+            # Outside the lock: a lookup that already finished runs this inline
+            future.add_done_callback(lambda _f, k=key: self._forget(k))
+        return future
+
+    def _forget(self, key: Tuple[str, bool]) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _call(self, client, address: str) -> List[Dict[str, Any]]:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return client.geocode(address, region="in")
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retriable(e):
+                    raise
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Geocoding retry {attempt + 1} for {address} in {delay:.2f}s: {e}")
+                time.sleep(delay)
+        return []
+
+    def _resolve(self, address: str, client=None, persist: bool = True) -> Optional[Dict[str, Any]]:
+        client = client or self.client_factory()
+        if not client:
+            return None
+
+        clean_address = address.strip()
+        candidates = [clean_address]
+        # Optimized for Indian addresses: retry with ", India" appended
+        if not any(term in clean_address.lower() for term in ["india", "bharat"]):
+            candidates.append(f"{clean_address}, India")
+
+        errors = False
+        for candidate in candidates:
+            try:
+                results = self._call(client, candidate)
+            except Exception as e:
+                logger.error(f"Google Maps API error for {candidate}: {e}")
+                errors = True
+                continue
+            if results:
+                result = _to_result(results[0])
+                location = result["location"]
+                if persist:
+                    self.store.set(address, (location["lat"], location["lng"]))
+                return result
+
+        logger.warning(f"Failed to geocode: {address}")
+        if persist and not errors:
+            # Google answered and found nothing; errors (quota, network) may pass
+            self.store.set_failed(address)
+        return None
+
+    def geocode(self, address: str, client=None, persist: bool = True) -> Optional[Dict[str, Any]]:
+        """Blocking single lookup through the pool."""
+        if not address or not address.strip():
+            return None
+        return self.submit(address, client, persist).result()
+
+    def geocode_many(self, addresses: Iterable[str], client=None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fan out lookups in parallel and wait for all of them."""
+        futures = {
+            address: self.submit(address, client)
+            for address in dict.fromkeys(a for a in addresses if a and a.strip())
+        }
+        results = {}
+        for address, future in futures.items():
+            try:
+                results[address] = future.result()
+            except Exception as e:
+                logger.error(f"Geocoding failed for {address}: {e}")
+                results[address] = None
+        return results
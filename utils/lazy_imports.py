@@ -0,0 +1,80 @@
+import importlib
+import importlib.util
+import logging
+import threading
+from types import ModuleType
+from typing import Any
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_import_lock = threading.RLock()
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access,
+    so pages that never touch it don't pay for it on a cold start.
+    `genai.GenerativeModel(...)` works exactly as with `import ... as genai`.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                    logger.debug(f"Lazily imported {self._name}")
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+class LazyAttribute:
+    """
+    Stand-in for `from module import attr`: calling it or reading its
+    attributes imports the module first.
+    """
+
+    def __init__(self, module: str, attr: str):
+        self._module = LazyModule(module)
+        self._attr = attr
+
+    def _load(self) -> Any:
+        return getattr(self._module, self._attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._module._name}.{self._attr}>"
+
+
+def is_available(name: str) -> bool:
+    """Whether a module can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# Heavy SDKs, each imported the first time it is actually used
+genai = LazyModule("google.generativeai")
+googlemaps = LazyModule("googlemaps")
+folium = LazyModule("folium")
+st_folium = LazyAttribute("streamlit_folium", "st_folium")
+geodesic = LazyAttribute("geopy.distance", "geodesic")
+# Google sign-in, only used once a visitor starts the OAuth flow
+Flow = LazyAttribute("google_auth_oauthlib.flow", "Flow")
+build = LazyAttribute("googleapiclient.discovery", "build")
@@ -0,0 +1,212 @@
+import os
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+from google.api_core.exceptions import NotFound, ResourceExhausted
+
+from utils.lazy_imports import genai
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "gemini" (default) or "fake" for the offline stand-in below
+LLM_BACKEND_ENV = "LLM_BACKEND"
+
+Contents = Union[str, List[Dict[str, Any]]]
+
+
+class ResponseBlocked(Exception):
+    """The model returned no text because the prompt or reply was blocked."""
+
+    def __init__(self, feedback: Any = None):
+        self.feedback = feedback
+        super().__init__(f"Response blocked: {feedback}")
+
+
+class LLMBackend(ABC):
+    """
+    What the chat code needs from a language model. Implementations raise
+    the same google.api_core exceptions as Gemini (ResourceExhausted for
+    quota, NotFound for a missing model) so callers handle one error set.
+    """
+
+    model_name: str
+
+    @abstractmethod
+    def generate(self, contents: Contents, generation_config: Optional[dict] = None) -> str:
+        ...
+
+    @abstractmethod
+    def stream(self, contents: Contents, generation_config: Optional[dict] = None) -> Iterator[str]:
+        ...
+
+    @abstractmethod
+    async def generate_async(self, contents: Contents, generation_config: Optional[dict] = None) -> str:
+        ...
+
+    @abstractmethod
+    def stream_async(self, contents: Contents, generation_config: Optional[dict] = None) -> AsyncIterator[str]:
+        ...
+
+
+# --- Gemini ---
+def _response_text(response) -> str:
+    try:
+        return response.text
+    except ValueError:
+        # No text parts: blocked by safety filters, or an empty candidate
+        feedback = getattr(response, "prompt_feedback", None)
+        if feedback and getattr(feedback, "block_reason", None):
+            raise ResponseBlocked(feedback)
+        return ""
+
+
+class GeminiBackend(LLMBackend):
+    """google.generativeai GenerativeModel behind the LLMBackend interface."""
+
+    def __init__(self, model_name: str, **model_kwargs):
+        self.model = genai.GenerativeModel(model_name=model_name, **model_kwargs)
+        self.model_name = self.model.model_name
+
+    def generate(self, contents, generation_config=None):
+        response = self.model.generate_content(contents, generation_config=generation_config or None)
+        return _response_text(response)
+
+    def stream(self, contents, generation_config=None):
+        response = self.model.generate_content(
+            contents, generation_config=generation_config or None, stream=True
+        )
+        for chunk in response:
+            text = _response_text(chunk)
+            if text:
+                yield text
+
+    async def generate_async(self, contents, generation_config=None):
+        response = await self.model.generate_content_async(
+            contents, generation_config=generation_config or None
+        )
+        return _response_text(response)
+
+    async def stream_async(self, contents, generation_config=None):
+        response = await self.model.generate_content_async(
+            contents, generation_config=generation_config or None, stream=True
+        )
+        async for chunk in response:
+            text = _response_text(chunk)
+            if text:
+                yield text
+
+
+# --- Offline stand-in ---
+_FAKE_WORDS = (
+    "food donation NGO volunteer pickup surplus meals Annapurna donor register "
+    "accept deliver community hunger share fresh cooked packed nearby verify"
+).split()
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic offline model for load tests, CI and air-gapped hosts.
+
+    Replies are derived from a hash of the prompt, so the same prompt always
+    gets the same answer. `latency` is the delay before the first token,
+    `token_delay` the gap between streamed tokens. `quota_error_rate` and
+    `not_found_rate` inject ResourceExhausted / NotFound errors from a
+    seeded RNG, so a run with the same seed fails the same calls.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "models/fake-anni",
+        latency: float = 0.3,
+        token_delay: float = 0.02,
+        reply_tokens: int = 60,
+        quota_error_rate: float = 0.0,
+        not_found_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.model_name = model_name
+        self.latency = latency
+        self.token_delay = token_delay
+        self.reply_tokens = reply_tokens
+        self.quota_error_rate = quota_error_rate
+        self.not_found_rate = not_found_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model_name: Optional[str] = None) -> "FakeBackend":
+        """Settings from FAKE_LLM_* environment variables."""
+        return cls(
+            model_name=model_name or "models/fake-anni",
+            latency=float(os.getenv("FAKE_LLM_LATENCY", "0.3")),
+            token_delay=float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0.02")),
+            reply_tokens=int(os.getenv("FAKE_LLM_REPLY_TOKENS", "60")),
+            quota_error_rate=float(os.getenv("FAKE_LLM_QUOTA_ERROR_RATE", "0")),
+            not_found_rate=float(os.getenv("FAKE_LLM_NOT_FOUND_RATE", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    def _maybe_fail(self) -> None:
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.quota_error_rate:
+            raise ResourceExhausted("Quota exceeded for fake model (injected)")
+        if roll < self.quota_error_rate + self.not_found_rate:
+            raise NotFound(f"{self.model_name} is not found (injected)")
+
+    def _tokens(self, contents: Contents, generation_config: Optional[dict]) -> List[str]:
+        if isinstance(contents, str):
+            prompt = contents
+        else:
+            prompt = " ".join(str(p) for c in contents[-1:] for p in c.get("parts", []))
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        count = min(self.reply_tokens, (generation_config or {}).get("max_output_tokens") or self.reply_tokens)
+        words = [_FAKE_WORDS[digest[i % len(digest)] % len(_FAKE_WORDS)] for i in range(count)]
+        return [f"{word} " for word in words]
+
+    def generate(self, contents, generation_config=None):
+        self._maybe_fail()
+        tokens = self._tokens(contents, generation_config)
+        time.sleep(self.latency + self.token_delay * len(tokens))
+        return "".join(tokens).strip()
+
+    def stream(self, contents, generation_config=None):
+        self._maybe_fail()
+        time.sleep(self.latency)
+        for i, token in enumerate(self._tokens(contents, generation_config)):
+            if i:
+                time.sleep(self.token_delay)
+            yield token
+
+    async def generate_async(self, contents, generation_config=None):
+        self._maybe_fail()
+        tokens = self._tokens(contents, generation_config)
+        await asyncio.sleep(self.latency + self.token_delay * len(tokens))
+        return "".join(tokens).strip()
+
+    async def stream_async(self, contents, generation_config=None):
+        self._maybe_fail()
+        await asyncio.sleep(self.latency)
+        for i, token in enumerate(self._tokens(contents, generation_config)):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+
+def use_fake_backend() -> bool:
+    return os.getenv(LLM_BACKEND_ENV, "gemini").lower() == "fake"
+
+
+def create_backend(model_name: str, **model_kwargs) -> LLMBackend:
+    """Build the configured backend; model_kwargs only apply to Gemini."""
+    if use_fake_backend():
+        logger.info("Using the offline fake LLM backend")
+        return FakeBackend.from_env()
+    return GeminiBackend(model_name, **model_kwargs)
@@ -3,7 +3,9 @@ import logging
 from datetime import datetime
 from typing import Optional, Tuple, Dict, Any, List
 
-import googlemaps
+from utils.lazy_imports import googlemaps
+
+from utils.geocoding import GeocodePipeline, normalize_address
 
 # Optional Streamlit support
 try:
@@ -90,3 +92,70 @@ class GoogleMapsService:
         except Exception as e:
             self.handle_error("Error getting directions", e)
             return None
+
+
+# --- Shared Geocoding ---
+_maps_client = None
+
+
+def get_maps_client():
+    """Return a process-wide googlemaps client, or None if no API key is set."""
+    global _maps_client
+    if _maps_client is None:
+        api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        if not api_key:
+            logger.warning("GOOGLE_MAPS_API_KEY not found in environment variables")
+            return None
+        try:
+            _maps_client = googlemaps.Client(key=api_key)
+        except Exception as e:
+            logger.error(f"Google Maps API initialization failed: {e}")
+            return None
+    return _maps_client
+
+
+# Process-wide pool behind the Donor page's geocoding (India-specific: region
+# "in" and a ", India" fallback); GoogleMapsService calls the API directly
+geocode_pipeline = GeocodePipeline(get_maps_client)
+
+
+def geocode_to_coords(address: str, client=None, persist: bool = True) -> Optional[Tuple[float, float]]:
+    """
+    Geocode an address to (lat, lng) through the shared pipeline, which
+    checks the on-disk store first. With `persist=False` the result is
+    not added to the store.
+    """
+    result = geocode_pipeline.geocode(address, client, persist)
+    if not result:
+        return None
+    return (result["location"]["lat"], result["location"]["lng"])
+
+
+def geocode_many_to_coords(addresses, client=None) -> Dict[str, Optional[Tuple[float, float]]]:
+    """Geocode many addresses in parallel, respecting the shared QPS budget."""
+    results = geocode_pipeline.geocode_many(addresses, client)
+    return {
+        address: (r["location"]["lat"], r["location"]["lng"]) if r else None
+        for address, r in results.items()
+    }
+
+
+def ngo_location_fields(address: str, client=None) -> Dict[str, Any]:
+    """Build the lat/lng fields stored on an `ngos` document for its address."""
+    coords = geocode_to_coords(address, client)
+    if not coords:
+        return {}
+    return {
+        "lat": coords[0],
+        "lng": coords[1],
+        "geocoded_address": normalize_address(address),
+    }
+
+
+def get_ngo_coords(ngo: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Return stored coordinates for an NGO if they match its current address."""
+    if ngo.get("lat") is None or ngo.get("lng") is None:
+        return None
+    if ngo.get("geocoded_address") != normalize_address(ngo.get("address", "")):
+        return None
+    return (float(ngo["lat"]), float(ngo["lng"]))
@@ -0,0 +1,103 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import streamlit as st
+
+PAGE_SIZE_OPTIONS = (10, 20, 50)
+
+# A page starts after a cursor returned by the previous page (a Firestore
+# snapshot or a list offset); None is the first page
+Cursor = Any
+Rows = List[Dict[str, Any]]
+PageFetcher = Callable[[Cursor, int], Tuple[Rows, Cursor]]
+
+
+def slice_page(rows: Sequence[Dict[str, Any]], cursor: Cursor, page_size: int) -> Tuple[Rows, Cursor]:
+    """Page through an in-memory list, using offsets as cursors."""
+    offset = cursor or 0
+    end = offset + page_size
+    return list(rows[offset:end]), end if end < len(rows) else None
+
+
+def reset_paginated_list(key: str) -> None:
+    """Go back to the first page, e.g. after the data was refreshed."""
+    st.session_state.pop(f"{key}_pager", None)
+
+
+def _cell(value: Any) -> Any:
+    # Arrow cannot mix lists/dicts with scalars in one column
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return str(value)
+    return value
+
+
+def paginated_list(
+    key: str,
+    fetch_page: PageFetcher,
+    render_item: Callable[[Dict[str, Any]], None],
+    signature: Hashable = (),
+    compact_columns: Optional[Sequence[str]] = None,
+    page_sizes: Sequence[int] = PAGE_SIZE_OPTIONS,
+    default_page_size: int = 20,
+    empty_message: str = "Nothing to show.",
+) -> Rows:
+    """
+    Render one page of a list with Previous / Next controls.
+
+    `fetch_page(cursor, page_size)` returns the rows of the page and the
+    cursor of the next one (None on the last page), so only the visible
+    page is ever read. The page resets when `signature` (filters, search
+    text) or the page size changes. With `compact_columns`, a toggle shows
+    the page as one st.dataframe instead of a card and widgets per row.
+    Returns the rows shown.
+    """
+    controls = st.columns([2, 2, 6])
+    with controls[0]:
+        page_size = st.selectbox(
+            "Per page", page_sizes, key=f"{key}_page_size",
+            index=page_sizes.index(default_page_size) if default_page_size in page_sizes else 0,
+        )
+    compact = False
+    if compact_columns:
+        with controls[1]:
+            compact = st.toggle("Compact view", key=f"{key}_compact")
+
+    state_key = f"{key}_pager"
+    state = st.session_state.get(state_key)
+    if not state or state["signature"] != (signature, page_size):
+        # Cursors of the pages visited so far, so Previous can go back
+        state = {"signature": (signature, page_size), "cursors": [None]}
+        st.session_state[state_key] = state
+
+    rows, next_cursor = fetch_page(state["cursors"][-1], page_size)
+    if not rows and len(state["cursors"]) > 1:
+        # The page emptied under us (e.g. its last row was deleted)
+        state["cursors"].pop()
+        rows, next_cursor = fetch_page(state["cursors"][-1], page_size)
+
+    if not rows:
+        st.info(empty_message)
+        return rows
+
+    if compact:
+        st.dataframe(
+            [{c: _cell(row.get(c)) for c in compact_columns} for row in rows],
+            use_container_width=True, hide_index=True,
+        )
+    else:
+        for row in rows:
+            render_item(row)
+
+    page_number = len(state["cursors"])
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    # Callbacks run before the next script run, so the new page renders at once
+    with col_prev:
+        st.button("⬅️ Previous", key=f"{key}_prev", disabled=page_number == 1,
+                  on_click=state["cursors"].pop)
+    with col_page:
+        st.caption(f"Page {page_number}")
+    with col_next:
+        st.button("Next ➡️", key=f"{key}_next", disabled=next_cursor is None,
+                  on_click=state["cursors"].append, args=(next_cursor,))
+    return rows
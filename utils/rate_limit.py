@@ -0,0 +1,290 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Chat request budgets, in requests per minute; 0 disables a limit
+CHAT_RATE_PER_USER_RPM = float(os.getenv("CHAT_RATE_PER_USER_RPM", "10"))
+CHAT_BURST_PER_USER = float(os.getenv("CHAT_BURST_PER_USER", "5"))
+# Keep the global rate under the Gemini project quota
+CHAT_RATE_GLOBAL_RPM = float(os.getenv("CHAT_RATE_GLOBAL_RPM", "60"))
+CHAT_BURST_GLOBAL = float(os.getenv("CHAT_BURST_GLOBAL", "10"))
+# Requests that would queue longer than this are rejected with a retry time
+CHAT_MAX_QUEUE_WAIT = float(os.getenv("CHAT_MAX_QUEUE_WAIT", "20"))
+# How long the global budget pauses after the upstream reports a quota error
+CHAT_QUOTA_BACKOFF = float(os.getenv("CHAT_QUOTA_BACKOFF", "10"))
+
+
+class RateLimited(Exception):
+    """The request would wait longer than allowed; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Rate limited; retry in {retry_after:.1f}s")
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled at `rate` tokens per second up to `capacity`.
+    Tokens may go negative: that is a reservation, and later callers queue
+    behind it. A rate of 0 means unlimited. Not thread-safe on its own.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1
+
+    def pause(self, seconds: float, now: float) -> None:
+        """Hold back new tokens for at least `seconds`."""
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class RateLimiter:
+    """
+    A global token bucket plus one bucket per key (session id, client IP).
+
+    reserve() takes a token from each applicable bucket and returns how long
+    the caller must wait for its turn, or raises RateLimited when that wait
+    exceeds `max_wait`; nothing is consumed in that case.
+    """
+
+    def __init__(
+        self,
+        per_key_rpm: float = CHAT_RATE_PER_USER_RPM,
+        per_key_burst: float = CHAT_BURST_PER_USER,
+        global_rpm: float = CHAT_RATE_GLOBAL_RPM,
+        global_burst: float = CHAT_BURST_GLOBAL,
+        max_wait: float = CHAT_MAX_QUEUE_WAIT,
+        max_keys: int = 10_000,
+    ):
+        self.per_key_rate = per_key_rpm / 60.0
+        self.per_key_burst = per_key_burst
+        self.max_wait = max_wait
+        self.max_keys = max_keys
+        self.global_bucket = TokenBucket(global_rpm / 60.0, global_burst)
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+
+    def _key_bucket(self, key: Hashable) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.per_key_rate, self.per_key_burst)
+            self._buckets[key] = bucket
+            # Least recently seen keys go first; they are almost always refilled
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _applicable(self, key: Optional[Hashable], use_global: bool):
+        buckets = [self.global_bucket] if use_global else []
+        if key is not None:
+            buckets.append(self._key_bucket(key))
+        return buckets
+
+    def estimate(self, key: Optional[Hashable] = None, use_global: bool = True) -> float:
+        """Seconds a request would wait right now, without reserving."""
+        with self._lock:
+            now = time.monotonic()
+            return max((b.wait_time(now) for b in self._applicable(key, use_global)), default=0.0)
+
+    def reserve(self, key: Optional[Hashable] = None, use_global: bool = True,
+                max_wait: Optional[float] = None) -> float:
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            now = time.monotonic()
+            buckets = self._applicable(key, use_global)
+            wait = max((b.wait_time(now) for b in buckets), default=0.0)
+            if wait > max_wait:
+                raise RateLimited(wait)
+            for bucket in buckets:
+                bucket.take()
+        return wait
+
+    def acquire(self, key: Optional[Hashable] = None, use_global: bool = True) -> float:
+        """Reserve and sleep until the turn comes; returns the time waited."""
+        wait = self.reserve(key, use_global)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, key: Optional[Hashable] = None, use_global: bool = True) -> float:
+        wait = self.reserve(key, use_global)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float = CHAT_QUOTA_BACKOFF) -> None:
+        """Back off the global budget, e.g. after an upstream quota error."""
+        with self._lock:
+            self.global_bucket.pause(seconds, time.monotonic())
+        logger.warning(f"Upstream quota hit; pausing chat requests for {seconds:.0f}s")
+
+
+class Coalescer:
+    """
+    Lets concurrent threads asking for the same key share one result.
+
+    The first caller to claim() a key is the leader and must call finish();
+    everyone else gets the leader's Future to wait on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            return future, True
+
+    def finish(self, key: Hashable, result: Any) -> None:
+        with self._lock:
+            future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+
+class SharedStream:
+    """Chunks from one producer, replayed in full to any number of async readers."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: Any) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        self.error = error
+        self.closed = True
+        self._notify()
+
+    async def read(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.closed:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class AsyncCoalescer:
+    """
+    Shares one upstream call among concurrent identical async requests,
+    either as a single awaited result (run) or as a stream (share_stream).
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._streams: Dict[Hashable, SharedStream] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await factory() once per key; concurrent callers share the result."""
+        future = self._in_flight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled (e.g. its client left); go on our own
+                if not future.cancelled():
+                    raise
+                return await self.run(key, factory)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a leader without followers doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def share_stream(self, key: Hashable, open_stream: Callable[[], Awaitable[AsyncIterator[Any]]]) -> SharedStream:
+        """
+        Join the in-flight stream for key, or start one. The upstream stream
+        is pumped by a background task, so it completes (and every reader
+        gets it) even if the request that started it goes away.
+        """
+        shared = self._streams.get(key)
+        if shared is None:
+            shared = SharedStream()
+            self._streams[key] = shared
+            task = asyncio.create_task(self._pump(key, shared, open_stream))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return shared
+
+    async def _pump(self, key: Hashable, shared: SharedStream, open_stream) -> None:
+        try:
+            chunks = await open_stream()
+            try:
+                async for chunk in chunks:
+                    shared.publish(chunk)
+            finally:
+                aclose = getattr(chunks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+        except asyncio.CancelledError as e:
+            shared.close(e)
+            raise
+        except Exception as e:
+            shared.close(e)
+        else:
+            shared.close()
+        finally:
+            if self._streams.get(key) is shared:
+                del self._streams[key]
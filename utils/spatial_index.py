@@ -0,0 +1,190 @@
+import math
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from utils.distance import nearest
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KM_PER_DEGREE_LAT = 111.32
+
+
+class GridIndex:
+    """
+    In-memory spatial index that buckets points into fixed-size lat/lng cells
+    (a geohash-style grid). Radius queries only visit cells overlapping the
+    query's bounding box and rank candidates with the vectorized distance engine.
+
+    Entries are keyed (e.g. by Firestore document id) so the index can be
+    refreshed incrementally with upsert/remove/sync.
+    """
+
+    def __init__(self, cell_deg: float = 0.1):
+        self.cell_deg = cell_deg
+        self._lock = threading.RLock()
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float]]] = {}
+        self._entries: Dict[Hashable, Tuple[float, float, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def upsert(self, key: Hashable, lat: float, lng: float, payload: Any = None) -> None:
+        """Insert or move an entry."""
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                if (old[0], old[1]) == (lat, lng):
+                    self._entries[key] = (lat, lng, payload)
+                    return
+                self._discard_from_cell(key, old[0], old[1])
+            self._entries[key] = (lat, lng, payload)
+            self._cells.setdefault(self._cell(lat, lng), {})[key] = (lat, lng)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._discard_from_cell(key, old[0], old[1])
+
+    def _discard_from_cell(self, key: Hashable, lat: float, lng: float) -> None:
+        cell = self._cell(lat, lng)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def sync(self, items: Iterable[Tuple[Hashable, float, float, Any]]) -> Dict[str, int]:
+        """
+        Make the index match `items`, touching only entries that changed.
+        Returns counts of added/moved/removed entries.
+        """
+        stats = {"added": 0, "moved": 0, "removed": 0}
+        with self._lock:
+            seen = set()
+            for key, lat, lng, payload in items:
+                seen.add(key)
+                old = self._entries.get(key)
+                if old is None:
+                    stats["added"] += 1
+                elif (old[0], old[1]) != (lat, lng):
+                    stats["moved"] += 1
+                self.upsert(key, lat, lng, payload)
+            for key in [k for k in self._entries if k not in seen]:
+                self.remove(key)
+                stats["removed"] += 1
+        return stats
+
+    def _candidate_cells(self, lat: float, lng: float, radius_km: float):
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        dlng = min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+        lat_lo, lng_lo = self._cell(lat - dlat, lng - dlng)
+        lat_hi, lng_hi = self._cell(lat + dlat, lng + dlng)
+        for i in range(lat_lo, lat_hi + 1):
+            for j in range(lng_lo, lng_hi + 1):
+                bucket = self._cells.get((i, j))
+                if bucket:
+                    yield bucket
+
+    def candidates(self, origin: Tuple[float, float], radius_km: float) -> List[Tuple[Hashable, float, float]]:
+        """Entries in the cells overlapping the query's bounding box (unfiltered)."""
+        lat, lng = origin
+        with self._lock:
+            return [
+                (key, p_lat, p_lng)
+                for bucket in self._candidate_cells(lat, lng, radius_km)
+                for key, (p_lat, p_lng) in bucket.items()
+            ]
+
+    def query_radius(
+        self,
+        origin: Tuple[float, float],
+        radius_km: float,
+        top_k: Optional[int] = None,
+        accuracy: str = "haversine",
+    ) -> List[Tuple[Hashable, float, Any]]:
+        """Return (key, distance_km, payload) within radius_km, nearest first."""
+        with self._lock:
+            candidates = self.candidates(origin, radius_km)
+            if not candidates:
+                return []
+            keys, lats, lngs = zip(*candidates)
+            indices, distances = nearest(
+                origin, lats, lngs, max_km=radius_km, top_k=top_k, accuracy=accuracy
+            )
+            return [
+                (keys[i], float(d), self._entries[keys[i]][2])
+                for i, d in zip(indices.tolist(), distances.tolist())
+            ]
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, float, Any]]:
+        with self._lock:
+            return self._entries.get(key)
+
+
+class CollectionIndex:
+    """
+    Keeps a GridIndex in step with a collection's changes (see
+    FirestoreCache.subscribe), so a search only runs the radius query.
+
+    `locate(doc)` returns the point a document is indexed at, or None; such
+    documents are left out of the index and listed by unlocated() until a
+    change gives them a location.
+    """
+
+    def __init__(self, locate: Callable[[Dict[str, Any]], Optional[Tuple[float, float]]],
+                 index: Optional[GridIndex] = None, id_field: str = "id"):
+        self.locate = locate
+        self.index = index if index is not None else GridIndex()
+        self.id_field = id_field
+        self._lock = threading.Lock()
+        self._unlocated: Dict[Hashable, Dict[str, Any]] = {}
+
+    def apply(self, docs: Dict[Hashable, Optional[Dict[str, Any]]], reset: bool = False) -> Dict[str, int]:
+        """
+        Apply changed documents (None = deleted); with reset, `docs` is the
+        whole collection. Returns counts of indexed and unlocated documents.
+        """
+        located = []
+        unlocated = {}
+        removed = []
+        for key, doc in docs.items():
+            if doc is None:
+                removed.append(key)
+                continue
+            doc = dict(doc, **{self.id_field: key})
+            point = self.locate(doc)
+            if point is None:
+                unlocated[key] = doc
+            else:
+                located.append((key, point[0], point[1], doc))
+
+        with self._lock:
+            if reset:
+                self.index.sync(located)
+                self._unlocated = unlocated
+            else:
+                for key, lat, lng, doc in located:
+                    self.index.upsert(key, lat, lng, doc)
+                    self._unlocated.pop(key, None)
+                for key in list(unlocated) + removed:
+                    self.index.remove(key)
+                    self._unlocated.pop(key, None)
+                self._unlocated.update(unlocated)
+        return {"indexed": len(located), "unlocated": len(unlocated), "removed": len(removed)}
+
+    def unlocated(self) -> List[Dict[str, Any]]:
+        """Copies of the documents that have no location yet."""
+        with self._lock:
+            return [dict(doc) for doc in self._unlocated.values()]
+
+
+# Process-wide index of NGO coordinates, keyed by NGO document id
+ngo_index = GridIndex()
@@ -0,0 +1,194 @@
+"""
+Resized WebP variants of the app's images, served by Streamlit's static
+file serving (`server.enableStaticServing` in .streamlit/config.toml)
+from static/ at `app/static/...`.
+
+Pages reference a variant by source name and width; the browser fetches
+it once and caches it, instead of the image travelling over the websocket
+(or inline as base64) on every rerun. Variants are built at deploy time:
+
+    python -m utils.static_assets
+
+and any that are missing or older than their source are (re)built on
+first use in a process, so a fresh checkout still works.
+"""
+import os
+import re
+import hashlib
+import logging
+import argparse
+import threading
+from fnmatch import fnmatch
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+ASSETS_DIR = PROJECT_ROOT / "assets"
+# Streamlit serves static/ next to the main script (Annapurna.py)
+STATIC_DIR = PROJECT_ROOT / "static"
+STATIC_URL = "app/static"
+
+WEBP_QUALITY = int(os.getenv("ASSET_WEBP_QUALITY", "80"))
+
+# Source images (glob patterns under assets/) and the widths built for them.
+# Images narrower than a width are not upscaled.
+VARIANT_WIDTHS: Dict[str, Tuple[int, ...]] = {
+    "Banner - Annapurna.png": (800, 1600),
+    "Annapurna logo.png": (64, 512),
+    "donor-*.jpg": (480, 960),
+    "ngo-*.jpg": (480, 960),
+}
+
+_build_lock = threading.Lock()
+# None until the first build attempt in this process, then whether it worked
+_built: Optional[bool] = None
+
+
+def _widths(name: str) -> Tuple[int, ...]:
+    for pattern, widths in VARIANT_WIDTHS.items():
+        if fnmatch(name, pattern):
+            return widths
+    return ()
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", Path(name).stem.lower()).strip("-")
+
+
+def variant_path(name: str, width: int) -> Path:
+    return STATIC_DIR / f"{_slug(name)}-{width}.webp"
+
+
+def _sources() -> List[Path]:
+    return sorted(p for p in ASSETS_DIR.iterdir() if p.is_file() and _widths(p.name))
+
+
+def _build_variant(source: Path, width: int, force: bool = False) -> Optional[Path]:
+    target = variant_path(source.name, width)
+    if not force and target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+        return None
+
+    from PIL import Image
+
+    with Image.open(source) as image:
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        partial = target.with_suffix(".tmp")
+        image.save(partial, "WEBP", quality=WEBP_QUALITY, method=6)
+    os.replace(partial, target)
+    return target
+
+
+def build(force: bool = False) -> List[Path]:
+    """Build every variant that is missing or stale. Returns the files written."""
+    written = []
+    for source in _sources():
+        for width in _widths(source.name):
+            target = _build_variant(source, width, force)
+            if target is not None:
+                written.append(target)
+                logger.info(f"Built {target.name} ({target.stat().st_size / 1024:.0f} KB) from {source.name}")
+    return written
+
+
+def ensure_built() -> bool:
+    """
+    Build missing variants once per process; False if that is not possible
+    here. A failed build is not retried, so pages fall back to the original
+    images straight away instead of re-running it on every image.
+    """
+    global _built
+    if _built is None:
+        with _build_lock:
+            if _built is None:
+                try:
+                    build()
+                    _built = True
+                except Exception as e:
+                    logger.warning(f"Could not build static image variants: {e}")
+                    _built = False
+    return _built
+
+
+@lru_cache(maxsize=None)
+def _version(path: Path, mtime: float) -> str:
+    return hashlib.md5(path.read_bytes()).hexdigest()[:10]
+
+
+def asset_url(name: str, width: int) -> Optional[str]:
+    """
+    Static URL of the variant of assets/<name> at `width`, or None if it
+    is not available. The content hash in `?v=` lets the browser cache it
+    for good (Tornado sends a long max-age for versioned static URLs).
+    """
+    if width not in _widths(name) or not ensure_built():
+        return None
+    path = variant_path(name, width)
+    if not path.exists():
+        return None
+    return f"{STATIC_URL}/{path.name}?v={_version(path, path.stat().st_mtime)}"
+
+
+def asset_srcset(name: str) -> str:
+    """`srcset` attribute value listing every built width of an image."""
+    urls = ((asset_url(name, w), w) for w in _widths(name))
+    return ", ".join(f"{url} {w}w" for url, w in urls if url)
+
+
+def asset_path(name: str, width: int) -> str:
+    """Local path of the variant if built, else of the original image."""
+    if width in _widths(name) and ensure_built() and variant_path(name, width).exists():
+        return str(variant_path(name, width))
+    return str(ASSETS_DIR / name)
+
+
+def static_image(name: str, width: int, caption: Optional[str] = None, max_width: str = "100%") -> None:
+    """
+    Show an image from assets/ at up to `width` pixels, served statically.
+    Falls back to st.image with the original file if no variant exists.
+    """
+    import streamlit as st
+
+    url = asset_url(name, width)
+    if url is None:
+        source = ASSETS_DIR / name
+        if not source.is_file():
+            logger.warning(f"Image not found: {source}")
+            return
+        st.image(str(source), caption=caption, use_container_width=True)
+        return
+
+    caption_html = (
+        f'<figcaption style="text-align: center; font-size: 0.875rem; opacity: 0.6;">{caption}</figcaption>'
+        if caption else ""
+    )
+    st.markdown(f"""
+    <figure style="margin: 0 0 1rem 0;">
+        <img src="{url}" srcset="{asset_srcset(name)}" sizes="(max-width: 768px) 100vw, 50vw"
+             alt="{caption or Path(name).stem}" loading="lazy"
+             style="width: 100%; max-width: {max_width}; height: auto; border-radius: 0.5rem;">
+        {caption_html}
+    </figure>
+    """, unsafe_allow_html=True)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build resized WebP variants of the app's images into static/")
+    parser.add_argument("--force", action="store_true", help="Rebuild every variant, even if up to date")
+    args = parser.parse_args(argv)
+
+    written = build(force=args.force)
+    total = sum(p.stat().st_size for p in STATIC_DIR.glob("*.webp"))
+    print(f"{len(written)} variant(s) written; static/ holds {total / 1024:.0f} KB of images")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,14 @@ import streamlit as st
 from pathlib import Path
 import os
 
+from utils.static_assets import asset_path
+
 def set_page_config():
     """Set the page configuration for the Streamlit app."""
     st.set_page_config(
         page_title="Annapurna",
-        # Use your logo for the icon
-        page_icon="assets/Annapurna logo.png", 
+        # Use your logo for the icon (a small variant, not the 440 KB original)
+        page_icon=asset_path("Annapurna logo.png", 64),
         layout="wide",
         initial_sidebar_state="expanded"
     )